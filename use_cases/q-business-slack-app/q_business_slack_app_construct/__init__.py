@@ -1 +1,6 @@
+from .constants import ENV_DEV, ENV_PROD
 from .construct import QBusinessSlackApp
+from .function_settings import (
+    FunctionSettings, FUNC_HANDLE_SLACK_EVENT, FUNC_ONBOARDING, FUNC_HANDLE_SLASH_COMMAND, FUNC_DISPATCHER, FUNC_ASK,
+    FUNC_CHAT_SYNC, FUNC_HELP, FUNC_INVALIDATE_ANSWERS
+)
@@ -1,35 +1,37 @@
-import boto3
+import json
+import os
 
 from libs_finder import *
 
 
-client = boto3.client('lambda')
+register_snapshot_hooks(services=['lambda', 'sqs', 'dynamodb', 'secretsmanager'], slack=True)
 
 
+@instrument_handler
 @validate_command
-def handler(event, context):
-    manager = SlackManager(body=event['body'])
+def handler(event, context, request):
+    manager = SlackManager(request=request)
+    text = request.args[0]
+    ts = ask(manager, text)
 
-    # Trim the text until the first space (which is after the operation) and remove double quotes
-    index = manager.text.index(" ") + 2
-    text = manager.text[index:-1]
-
-    with open('response_block.json') as fd:
-        blocks = json.load(fd)
-        blocks[0]['elements'][1]['elements'][0]['text'] = text
-
-    response = manager.post_message(blocks, text='Processing...')
-
-    # Asynchronously invoke the Lambda function that queries the model
-    if response['ok']:
+    # Asynchronously trigger the Lambda function that queries the model
+    if ts is not None:
         payload = {
             'text': text,
-            'ts': response['ts'],
-            'channel_id': manager.channel_id
+            'ts': ts,
+            'channel_id': manager.channel_id,
+            'user_id': manager.user_id
         }
 
-        client.invoke(
-            FunctionName=os.environ['FUNC_CHAT_SYNC'] + f':{get_slack_env()}',
-            InvocationType='Event',
-            Payload=json.dumps(payload).encode('utf-8'),
-        )
+        # Buffer the question in the queue, if there is one, so that bursts are smoothed out
+        if f'QUEUE_URL_{request.env}' in os.environ:
+            get_client('sqs').send_message(
+                QueueUrl=os.environ[f'QUEUE_URL_{request.env}'],
+                MessageBody=json.dumps(payload)
+            )
+        else:
+            get_client('lambda').invoke(
+                FunctionName=os.environ['FUNC_CHAT_SYNC'] + f':{request.env}',
+                InvocationType='Event',
+                Payload=json.dumps(payload).encode('utf-8'),
+            )
@@ -0,0 +1,65 @@
+import json
+
+from libs_finder import *
+
+
+register_snapshot_hooks(services=['lambda', 'qbusiness', 'dynamodb', 'secretsmanager'], slack=True)
+
+
+def __get_target_env(request):
+    try:
+        return request.env
+    except ValueError:
+        # Commands that can't be parsed are reported by the validation of this same alias
+        return get_lambda_env()
+
+
+@verify_slack_request
+@deduplicate_slack_request
+def __dispatch(event, context, request):
+    # Hand the command over to the alias of the Slack environment set by the user, which validates it, so that it's only
+    # validated and rate limited once
+    if __get_target_env(request) != get_lambda_env():
+        get_client('lambda').invoke(
+            FunctionName=context.function_name + f':{request.env}',
+            InvocationType='Event',
+            Payload=json.dumps(event).encode('utf-8')
+        )
+
+        return {'statusCode': 200}
+
+    return __run_command(event, context, request)
+
+
+@validate_command
+def __run_command(event, context, request):
+    manager = SlackManager(request=request)
+
+    if request.operation == OP_HELP:
+        display_help(manager)
+    elif request.operation == OP_ASK:
+        text = request.args[0]
+        ts = ask(manager, text)
+
+        # Query the model in this same invocation
+        if ts is not None:
+            chat_sync(text, ts, manager.channel_id, manager, user_id=manager.user_id)
+
+    return {'statusCode': 200}
+
+
+@instrument_handler
+def handler(event, context):
+    # Follow-up questions are handed over by the handleSlackEvent function, once posted in their thread
+    if 'thread_ts' in event:
+        chat_sync(
+            event['text'], event['ts'], event['channel_id'], thread_ts=event['thread_ts'], user_id=event['user_id']
+        )
+        return
+
+    request = SlackRequest(event)
+    response = __dispatch(event, context, request)
+
+    # API Gateway has already acknowledged the command, so validation errors have to be sent to the user
+    if response['statusCode'] == 200 and 'body' in response:
+        SlackManager(request=request).post_ephemeral(None, text=json.loads(response['body'])['text'])
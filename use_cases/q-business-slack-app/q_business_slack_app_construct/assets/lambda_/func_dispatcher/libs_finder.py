@@ -0,0 +1,26 @@
+import os
+
+
+def is_aws_env() -> bool:
+    return 'AWS_LAMBDA_FUNCTION_NAME' in os.environ or 'AWS_EXECUTION_ENV' in os.environ
+
+
+# Only the names used by this function are imported, so that the rest of the layer is never loaded
+if is_aws_env():
+    from app_layer import (
+        OP_ASK, OP_HELP, SlackManager, SlackRequest, deduplicate_slack_request, get_client, get_lambda_env,
+        instrument_handler, register_snapshot_hooks, validate_command, verify_slack_request
+    )
+    from app_layer.operations.ask import ask
+    from app_layer.operations.chat_sync import chat_sync
+    from app_layer.operations.display_help import display_help
+else:
+    from q_business_slack_app_construct.assets.lambda_.layer.python.app_layer import (
+        OP_ASK, OP_HELP, SlackManager, SlackRequest, deduplicate_slack_request, get_client, get_lambda_env,
+        instrument_handler, register_snapshot_hooks, validate_command, verify_slack_request
+    )
+    from q_business_slack_app_construct.assets.lambda_.layer.python.app_layer.operations.ask import ask
+    from q_business_slack_app_construct.assets.lambda_.layer.python.app_layer.operations.chat_sync import chat_sync
+    from q_business_slack_app_construct.assets.lambda_.layer.python.app_layer.operations.display_help import (
+        display_help
+    )
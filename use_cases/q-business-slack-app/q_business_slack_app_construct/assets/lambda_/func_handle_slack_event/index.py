@@ -1,30 +1,63 @@
+import json
+import os
+import re
+
 from libs_finder import *
 
 
-def __onboard_user(user_id, channel_id):
-    slack = SlackManager()
+register_snapshot_hooks(services=['lambda', 'dynamodb', 'secretsmanager'], slack=True)
+
+# Mentions of users and of the app itself, e.g. <@U012AB3CD>
+__MENTION = re.compile(r'<@[A-Z0-9]+>')
+
+
+def __process_app_home_opened(user_id, channel_id):
+    if 'FUNC_ONBOARDING' not in os.environ:
+        onboard_user(user_id, channel_id)
+        return
+
+    # Returning users are recognised here, with a single query at most, so only new users need the onboarding function
+    if users_manager.is_known_user(user_id):
+        return
+
+    # Slack is acknowledged straight away, while the onboarding function calls Slack
+    get_client('lambda').invoke(
+        FunctionName=os.environ['FUNC_ONBOARDING'] + f':{get_lambda_env()}',
+        InvocationType='Event',
+        Payload=json.dumps({'user_id': user_id, 'channel_id': channel_id}).encode('utf-8')
+    )
+
 
-    response = slack.get_user_profile(user_id)
-    username = response['profile']['email'].split('@')[0]
-    response = users_manager.get_user(username)
+def __is_thread_reply(message):
+    # Messages sent by bots, including the answers of this app, and edits or deletions are not questions
+    return ('thread_ts' in message and message['thread_ts'] != message['ts'] and 'subtype' not in message and
+            'bot_id' not in message)
 
-    # New user
-    if response is None:
-        users_manager.add_user(username, channel_id, user_id)
 
-        # Send welcome message
-        with open('blocks/onboarding.json') as fd:
-            blocks = json.load(fd)
-            slack.post_message(blocks, blocks[0]['text']['text'], channel_id)
+def __process_thread_reply(message):
+    manager = SlackManager(channel_id=message['channel'], user_id=message['user'])
+    text = __MENTION.sub('', message['text']).strip()
+    ts = follow_up(manager, text, message['thread_ts']) if text else None
 
-        # Configure app home
-        with open('blocks/home.json') as fd:
-            blocks = fd.read()
-            slack.update_app_home(user_id, blocks)
+    # The conversation is continued by the function that queries the model
+    if ts is not None:
+        get_client('lambda').invoke(
+            FunctionName=os.environ['FUNC_CHAT_SYNC'] + f':{get_lambda_env()}',
+            InvocationType='Event',
+            Payload=json.dumps({
+                'text': text,
+                'ts': ts,
+                'channel_id': manager.channel_id,
+                'thread_ts': message['thread_ts'],
+                'user_id': manager.user_id
+            }).encode('utf-8')
+        )
 
 
+@instrument_handler
 @verify_slack_request
-def handler(event, context):
+@deduplicate_slack_request
+def handler(event, context, request):
     body = json.loads(event['body'])
 
     if 'type' in body and body['type'] == 'url_verification':
@@ -37,6 +70,8 @@ def handler(event, context):
         channel = body['event']['channel']
 
         if channel and user_id:
-            __onboard_user(user_id, channel)
+            __process_app_home_opened(user_id, channel)
+    elif body['event']['type'] == 'message' and __is_thread_reply(body['event']):
+        __process_thread_reply(body['event'])
 
     return {'statusCode': 200}
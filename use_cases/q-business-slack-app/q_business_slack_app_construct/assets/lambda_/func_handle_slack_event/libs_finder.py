@@ -5,7 +5,16 @@ def is_aws_env() -> bool:
     return 'AWS_LAMBDA_FUNCTION_NAME' in os.environ or 'AWS_EXECUTION_ENV' in os.environ
 
 
+# Only the names used by this function are imported, so that the rest of the layer is never loaded
 if is_aws_env():
-    from app_layer import *
+    from app_layer import (
+        SlackManager, deduplicate_slack_request, get_client, get_lambda_env, instrument_handler, onboard_user,
+        register_snapshot_hooks, users_manager, verify_slack_request
+    )
+    from app_layer.operations.follow_up import follow_up
 else:
-    from q_business_slack_app_construct.assets.lambda_.layer.python.app_layer import *
+    from q_business_slack_app_construct.assets.lambda_.layer.python.app_layer import (
+        SlackManager, deduplicate_slack_request, get_client, get_lambda_env, instrument_handler, onboard_user,
+        register_snapshot_hooks, users_manager, verify_slack_request
+    )
+    from q_business_slack_app_construct.assets.lambda_.layer.python.app_layer.operations.follow_up import follow_up
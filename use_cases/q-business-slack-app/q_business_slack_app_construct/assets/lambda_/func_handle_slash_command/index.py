@@ -1,25 +1,25 @@
-import boto3
+import json
+import os
 
 from libs_finder import *
 
 
-client = boto3.client('lambda')
+register_snapshot_hooks(services=['lambda', 'dynamodb', 'secretsmanager'])
 
 
+@instrument_handler
 @verify_slack_request
+@deduplicate_slack_request
 @validate_command
-def handler(event, context):
+def handler(event, context, request):
     opp_to_function_mapping = {
         OP_ASK: os.environ['FUNC_ASK'],
         OP_HELP: os.environ['FUNC_HELP'],
     }
 
-    manager = SlackManager(body=event['body'])
-    operation, _, _ = parse_slash_command(manager.text)
-
     # Invoke the target Lambda function asynchronously using the Slack environment set by the user
-    client.invoke(
-        FunctionName=opp_to_function_mapping[operation] + f':{get_slack_env()}',
+    get_client('lambda').invoke(
+        FunctionName=opp_to_function_mapping[request.operation] + f':{request.env}',
         InvocationType='Event',
         Payload=json.dumps({'body': event['body']}).encode('utf-8')
     )
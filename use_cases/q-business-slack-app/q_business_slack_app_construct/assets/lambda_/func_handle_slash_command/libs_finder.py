@@ -5,7 +5,14 @@ def is_aws_env() -> bool:
     return 'AWS_LAMBDA_FUNCTION_NAME' in os.environ or 'AWS_EXECUTION_ENV' in os.environ
 
 
+# Only the names used by this function are imported, so that the rest of the layer is never loaded
 if is_aws_env():
-    from app_layer import *
+    from app_layer import (
+        OP_ASK, OP_HELP, deduplicate_slack_request, get_client, instrument_handler, register_snapshot_hooks,
+        validate_command, verify_slack_request
+    )
 else:
-    from q_business_slack_app_construct.assets.lambda_.layer.python.app_layer import *
+    from q_business_slack_app_construct.assets.lambda_.layer.python.app_layer import (
+        OP_ASK, OP_HELP, deduplicate_slack_request, get_client, instrument_handler, register_snapshot_hooks,
+        validate_command, verify_slack_request
+    )
@@ -1,11 +1,12 @@
 from libs_finder import *
 
 
+register_snapshot_hooks(services=['secretsmanager'], slack=True)
+
+
+@instrument_handler
 def handler(event, context):
     body = event['body']
     manager = SlackManager(body=body)
 
-    with open('response_block.json') as fd:
-        blocks = json.load(fd)
-
-    manager.post_ephemeral(blocks, text='Application help')
+    display_help(manager)
@@ -0,0 +1,52 @@
+import os
+
+from datetime import datetime, timedelta, timezone
+from libs_finder import *
+
+
+__SYNC_STATUSES = ['SUCCEEDED', 'INCOMPLETE']
+
+
+def __get_last_sync_time():
+    client = get_client('qbusiness')
+    app_id = os.environ['APP_ID']
+    now = datetime.now(timezone.utc)
+    last_sync_time = None
+
+    for page in client.get_paginator('list_indices').paginate(applicationId=app_id):
+        for index in page['indices']:
+            data_sources = client.get_paginator('list_data_sources').paginate(
+                applicationId=app_id,
+                indexId=index['indexId']
+            )
+
+            for data_source in [ds for p in data_sources for ds in p['dataSources']]:
+                sync_jobs = client.get_paginator('list_data_source_sync_jobs').paginate(
+                    applicationId=app_id,
+                    indexId=index['indexId'],
+                    dataSourceId=data_source['dataSourceId'],
+                    startTime=now - timedelta(days=1),
+                    endTime=now
+                )
+
+                for job in [j for p in sync_jobs for j in p['history']]:
+                    if job['status'] in __SYNC_STATUSES and 'endTime' in job:
+                        if last_sync_time is None or job['endTime'] > last_sync_time:
+                            last_sync_time = job['endTime']
+
+    return last_sync_time
+
+
+@instrument_handler
+def handler(event, context):
+    last_sync_time = __get_last_sync_time()
+
+    if last_sync_time is None:
+        return
+
+    # The end time of the last sync identifies the generation of the data sources
+    generation = last_sync_time.astimezone(timezone.utc).isoformat()
+
+    for env in Env:
+        if answers_manager.get_answers_generation(env.value) < generation:
+            answers_manager.invalidate_answers(generation, env.value)
@@ -0,0 +1,16 @@
+import os
+
+
+def is_aws_env() -> bool:
+    return 'AWS_LAMBDA_FUNCTION_NAME' in os.environ or 'AWS_EXECUTION_ENV' in os.environ
+
+
+# Only the names used by this function are imported, so that the rest of the layer is never loaded
+if is_aws_env():
+    from app_layer import (
+        Env, answers_manager, get_client, instrument_handler
+    )
+else:
+    from q_business_slack_app_construct.assets.lambda_.layer.python.app_layer import (
+        Env, answers_manager, get_client, instrument_handler
+    )
@@ -0,0 +1,10 @@
+from libs_finder import *
+
+
+register_snapshot_hooks(services=['dynamodb', 'secretsmanager'], slack=True)
+
+
+# Invoked asynchronously by the handleSlackEvent function, which has already acknowledged the event to Slack
+@instrument_handler
+def handler(event, context):
+    onboard_user(event['user_id'], event['channel_id'])
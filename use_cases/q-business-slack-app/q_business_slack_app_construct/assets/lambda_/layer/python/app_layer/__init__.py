@@ -1,3 +1,19 @@
-from .utils import *
 from .constants import *
-from .entity_managers import *
\ No newline at end of file
+from . import constants, utils, entity_managers, operations
+
+
+# Names are imported from the subpackages on first use, so that each function only pays for the modules it needs.
+# Importing everything with * is still supported, but it loads the whole layer
+__SUBPACKAGES = [utils, entity_managers, operations]
+
+
+def __getattr__(name):
+    for package in __SUBPACKAGES:
+        if name in package.__all__:
+            return getattr(package, name)
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+__all__ = [name for name in vars(constants) if not name.startswith('_')] + \
+    [name for package in __SUBPACKAGES for name in package.__all__]
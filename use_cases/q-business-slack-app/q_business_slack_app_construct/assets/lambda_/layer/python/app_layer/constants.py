@@ -4,6 +4,22 @@ from enum import Enum
 KEY_USERNAME = 'username'
 KEY_CHANNEL_ID = 'channel_id'
 KEY_USER_ID = 'user_id'
+KEY_CACHE_KEY = 'cache_key'
+KEY_SYSTEM_MESSAGE = 'system_message'
+KEY_SOURCE_ATTRIBUTIONS = 'source_attributions'
+KEY_GENERATION = 'generation'
+KEY_EXPIRES_AT = 'expires_at'
+KEY_IDEMPOTENCY_KEY = 'idempotency_key'
+KEY_BUCKET_KEY = 'bucket_key'
+KEY_REFILL_AT = 'refill_at'
+KEY_THREAD_KEY = 'thread_key'
+KEY_CONVERSATION_ID = 'conversation_id'
+KEY_PARENT_MESSAGE_ID = 'parent_message_id'
+
+INDEX_USER_ID = 'UserIdIndex'
+
+SECRET_SLACK_TOKEN = 'SlackToken'
+SECRET_SLACK_SIGNING_SECRET = 'SlackSigningSecret'
 
 
 class Env(Enum):
@@ -1,2 +1,11 @@
-from . import users_manager
-from .slack_manager import SlackManager
+from ..lazy_imports import lazy_attributes
+
+
+__getattr__, __dir__, __all__ = lazy_attributes(globals(), {
+    'users_manager': ['users_manager'],
+    'answers_manager': ['answers_manager'],
+    'idempotency_manager': ['idempotency_manager'],
+    'rate_limits_manager': ['rate_limits_manager'],
+    'threads_manager': ['threads_manager'],
+    'slack_manager': ['SlackManager']
+})
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+from collections import OrderedDict
+from ..utils.aws_utils import get_client
+from ..utils.lambda_utils import get_lambda_env
+from ..constants import *
+
+
+__LRU_MAX_SIZE = int(os.environ.get('ANSWERS_LRU_MAX_SIZE', 256))
+
+# Answers cached in the container are not checked against the data source generation until they are this old
+__LRU_TTL_SECONDS = 60
+
+# Key of the item that stores the generation of the data sources, which changes every time they are synced
+__GENERATION_KEY = '__generation__'
+
+__lru = OrderedDict()
+
+
+def __get_answers_table(env=None):
+    return os.environ[f'TABLE_ANSWERS_{env or get_lambda_env()}']
+
+
+def __get_cache_key(question):
+    key = f"{os.environ['APP_ID']}|{get_lambda_env()}|{normalize_question(question)}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def __remember(key, answer):
+    __lru[key] = (answer, time.monotonic())
+    __lru.move_to_end(key)
+
+    if len(__lru) > __LRU_MAX_SIZE:
+        __lru.popitem(last=False)
+
+
+def is_answers_cache_enabled() -> bool:
+    return 'ANSWERS_TTL_SECONDS' in os.environ
+
+
+def normalize_question(question: str) -> str:
+    question = re.sub(r'[^\w\s]', ' ', question.lower())
+    return ' '.join(question.split())
+
+
+def get_answer(question: str):
+    key = __get_cache_key(question)
+
+    if key in __lru and time.monotonic() - __lru[key][1] < __LRU_TTL_SECONDS:
+        __lru.move_to_end(key)
+        return __lru[key][0]
+
+    # Retrieve the answer and the current generation of the data sources in a single call
+    table = __get_answers_table()
+    response = get_client('dynamodb').batch_get_item(
+        RequestItems={
+            table: {
+                'Keys': [
+                    {KEY_CACHE_KEY: {'S': key}},
+                    {KEY_CACHE_KEY: {'S': __GENERATION_KEY}}
+                ]
+            }
+        }
+    )
+
+    items = {item[KEY_CACHE_KEY]['S']: item for item in response['Responses'].get(table, [])}
+    item = items.get(key)
+    generation = items[__GENERATION_KEY][KEY_GENERATION]['S'] if __GENERATION_KEY in items else ''
+
+    # Expired items may still be returned until DynamoDB deletes them
+    if (item is None or int(item[KEY_EXPIRES_AT]['N']) <= time.time() or
+            item[KEY_GENERATION]['S'] != generation):
+        __lru.pop(key, None)
+        return None
+
+    answer = {
+        'systemMessage': item[KEY_SYSTEM_MESSAGE]['S'],
+        'sourceAttributions': json.loads(item[KEY_SOURCE_ATTRIBUTIONS]['S'])
+    }
+
+    __remember(key, answer)
+
+    return answer
+
+
+def put_answer(question: str, system_message: str, source_attributions: list):
+    key = __get_cache_key(question)
+    answer = {
+        'systemMessage': system_message,
+        'sourceAttributions': [{'title': a['title'], 'url': a['url']} for a in source_attributions]
+    }
+
+    get_client('dynamodb').put_item(
+        TableName=__get_answers_table(),
+        Item={
+            KEY_CACHE_KEY: {'S': key},
+            KEY_SYSTEM_MESSAGE: {'S': system_message},
+            KEY_SOURCE_ATTRIBUTIONS: {'S': json.dumps(answer['sourceAttributions'])},
+            KEY_GENERATION: {'S': get_answers_generation()},
+            KEY_EXPIRES_AT: {'N': str(int(time.time()) + int(os.environ['ANSWERS_TTL_SECONDS']))}
+        }
+    )
+
+    __remember(key, answer)
+
+
+def invalidate_answers(generation: str, env: str = None):
+    # Answers stored with a different generation are ignored from now on
+    get_client('dynamodb').put_item(
+        TableName=__get_answers_table(env),
+        Item={
+            KEY_CACHE_KEY: {'S': __GENERATION_KEY},
+            KEY_GENERATION: {'S': generation}
+        }
+    )
+
+
+def get_answers_generation(env: str = None) -> str:
+    response = get_client('dynamodb').get_item(
+        TableName=__get_answers_table(env),
+        Key={KEY_CACHE_KEY: {'S': __GENERATION_KEY}}
+    )
+
+    return response['Item'][KEY_GENERATION]['S'] if 'Item' in response else ''
@@ -0,0 +1,71 @@
+import os
+import time
+
+from collections import OrderedDict
+from ..utils.aws_utils import get_client
+from ..utils.lambda_utils import get_lambda_env
+from ..constants import *
+
+
+__LRU_MAX_SIZE = int(os.environ.get('IDEMPOTENCY_LRU_MAX_SIZE', 1024))
+
+# Slack gives up retrying an event after a few minutes, so keys only need to be kept for a while longer
+__TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', 3600))
+
+# Keys claimed by this container, with the time at which they expire
+__claimed_keys = OrderedDict()
+
+
+def __get_idempotency_table():
+    return os.environ[f'TABLE_IDEMPOTENCY_{get_lambda_env()}']
+
+
+def __remember(key, expires_at):
+    __claimed_keys[key] = expires_at
+    __claimed_keys.move_to_end(key)
+
+    if len(__claimed_keys) > __LRU_MAX_SIZE:
+        __claimed_keys.popitem(last=False)
+
+
+def is_claimed_locally(key: str) -> bool:
+    return __claimed_keys.get(key, 0) > time.time()
+
+
+def claim(key: str) -> bool:
+    # Returns False if the key was already claimed, by this or any other container
+    if is_claimed_locally(key):
+        return False
+
+    now = int(time.time())
+    expires_at = now + __TTL_SECONDS
+
+    try:
+        # Expired items may still be returned until DynamoDB deletes them
+        get_client('dynamodb').put_item(
+            TableName=__get_idempotency_table(),
+            Item={
+                KEY_IDEMPOTENCY_KEY: {'S': key},
+                KEY_EXPIRES_AT: {'N': str(expires_at)}
+            },
+            ConditionExpression='attribute_not_exists(#key) OR #expires_at < :now',
+            ExpressionAttributeNames={'#key': KEY_IDEMPOTENCY_KEY, '#expires_at': KEY_EXPIRES_AT},
+            ExpressionAttributeValues={':now': {'N': str(now)}}
+        )
+    except get_client('dynamodb').exceptions.ConditionalCheckFailedException:
+        __remember(key, expires_at)
+        return False
+
+    __remember(key, expires_at)
+
+    return True
+
+
+def release(key: str):
+    # Lets the request be processed again when it failed, e.g. when Slack retries it
+    __claimed_keys.pop(key, None)
+
+    get_client('dynamodb').delete_item(
+        TableName=__get_idempotency_table(),
+        Key={KEY_IDEMPOTENCY_KEY: {'S': key}}
+    )
@@ -0,0 +1,104 @@
+import os
+import time
+
+from ..utils.aws_utils import get_client
+from ..constants import *
+
+
+# Each bucket is stored as the time at which it will be full again (generic cell rate algorithm), which is equivalent to
+# a token bucket but can be updated with a single conditional write, without reading the bucket first
+
+# Latest refill time known by this container for each bucket, by environment and key, as each environment has a table
+# of its own. It only ever grows, so it's enough to reject requests without calling DynamoDB, but not to accept them
+__refill_times = {}
+
+
+def __get_rate_limits_table(env):
+    return os.environ.get(f'TABLE_RATE_LIMITS_{env}')
+
+
+def __update_bucket(table, key, update_expression, condition_expression, values):
+    try:
+        response = get_client('dynamodb').update_item(
+            TableName=table,
+            Key={KEY_BUCKET_KEY: {'S': key}},
+            UpdateExpression=update_expression,
+            ConditionExpression=condition_expression,
+            ExpressionAttributeNames={'#refill_at': KEY_REFILL_AT, '#expires_at': KEY_EXPIRES_AT},
+            ExpressionAttributeValues={name: {'N': str(value)} for name, value in values.items()},
+            ReturnValues='UPDATED_NEW',
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
+        )
+    except get_client('dynamodb').exceptions.ConditionalCheckFailedException as e:
+        item = e.response.get('Item', {})
+        return False, int(item[KEY_REFILL_AT]['N']) if KEY_REFILL_AT in item else None
+
+    return True, int(response['Attributes'][KEY_REFILL_AT]['N'])
+
+
+def __consume_locally(key, now, interval, burst):
+    refill_at = max(__refill_times.get(key, 0), now) + interval
+
+    if refill_at - now > interval * burst:
+        return False, refill_at - interval
+
+    return True, refill_at
+
+
+# Takes a token from the bucket and returns 0, or the number of seconds until a token is available if it's empty.
+# Buckets hold up to capacity tokens and get a new one every refill_seconds
+def consume(key: str, capacity: int, refill_seconds: float, env: str) -> float:
+    now = int(time.time() * 1000)
+    interval = int(refill_seconds * 1000)
+    limit = now + interval * (capacity - 1)
+    bucket = (env, key)
+    known_refill_at = __refill_times.get(bucket, 0)
+
+    if known_refill_at > limit:
+        return (known_refill_at - limit) / 1000
+
+    table = __get_rate_limits_table(env)
+
+    if table is None:
+        allowed, refill_at = __consume_locally(bucket, now, interval, capacity)
+    else:
+        # Upper bound of the time at which the bucket will be full again
+        expires_at = (now + interval * capacity) // 1000 + 1
+
+        def refill():
+            # Full bucket, or one that has never been used
+            return __update_bucket(
+                table, key,
+                'SET #refill_at = :refill_at, #expires_at = :expires_at',
+                'attribute_not_exists(#refill_at) OR #refill_at <= :now',
+                {':refill_at': now + interval, ':expires_at': expires_at, ':now': now}
+            )
+
+        allowed, refill_at = False, None
+
+        # Not worth trying if the bucket is known to have been used
+        if known_refill_at <= now:
+            allowed, refill_at = refill()
+
+        if not allowed:
+            # Atomic increment, as long as the bucket has tokens left
+            allowed, refill_at = __update_bucket(
+                table, key,
+                'SET #refill_at = #refill_at + :interval, #expires_at = :expires_at',
+                '#refill_at <= :limit',
+                {':interval': interval, ':expires_at': expires_at, ':limit': limit}
+            )
+
+        if not allowed and refill_at is None:
+            # The bucket doesn't exist, e.g. because it expired after this container last used it
+            allowed, refill_at = refill()
+
+    if refill_at is not None:
+        __refill_times[bucket] = max(__refill_times.get(bucket, 0), refill_at)
+
+    if allowed:
+        return 0
+
+    # Nothing is known about when a bucket that could not be updated has tokens again, so let the request through. The
+    # same goes for a bucket created by another container in the meantime, which may still have tokens left
+    return 0 if refill_at is None else max(refill_at - limit, 0) / 1000
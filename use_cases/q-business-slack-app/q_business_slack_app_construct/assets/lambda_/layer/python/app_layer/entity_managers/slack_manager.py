@@ -1,67 +1,122 @@
-import json
+import os
+import threading
 
 from slack_sdk import WebClient
-from urllib.parse import unquote
+from slack_sdk.web import HTTPConnectionPool
+from ..utils.blocks_utils import validate_blocks
 from ..utils.secrets_manager_utils import *
+from ..utils.metrics_utils import METRIC_SLACK_API_LATENCY, span
+from ..utils.slack_request import SlackRequest
+from ..constants import *
 
 
 class SlackManager:
-    __TOKEN = get_secret_value("SlackToken")
+    # A single client is shared by every manager in the container, so its headers, user agent and retry handlers are
+    # only built once
+    __shared_client = None
+    __lock = threading.Lock()
+
+    @classmethod
+    def __create_client(cls):
+        with cls.__lock:
+            if cls.__shared_client is None:
+                # Keep the connections to Slack alive across calls and warm invocations. The Web API can be replaced
+                # with a local stand-in, e.g. by tools/load_test.py
+                cls.__shared_client = WebClient(
+                    base_url=os.environ.get('SLACK_API_URL', WebClient.BASE_URL),
+                    connection_pool=HTTPConnectionPool()
+                )
+
+        return cls.__shared_client
+
+    @classmethod
+    def __get_client(cls):
+        client = cls.__create_client()
+
+        # The token may have been rotated since the client was created
+        client.token = get_secret_value(SECRET_SLACK_TOKEN)
+
+        return client
 
-    def __init__(self, body='', channel_id=None, user_id=None, username=None):
-        self.__client = WebClient(token=self.__TOKEN)
+    @classmethod
+    def prime(cls):
+        # Create the shared client ahead of the first call, without retrieving the token, e.g. before a snapshot is taken
+        cls.__create_client()
+
+    @classmethod
+    def reset_connections(cls):
+        # Open connections don't survive a SnapStart restore
+        if cls.__shared_client is not None:
+            cls.__shared_client.connection_pool.close()
+
+    def __init__(self, body='', channel_id=None, user_id=None, username=None, request=None):
+        self.__client = self.__get_client()
         self.channel_id = channel_id
         self.user_id = user_id
         self.username = username
         self.__action_payload = {}
         self.__payload = {}
 
-        if body.startswith('payload='):
-            body = json.loads(unquote(body[len('payload='):]))
+        # Reuse the request parsed by the decorators, if any
+        if request is None and body:
+            request = SlackRequest({'body': body})
+
+        if request is not None and 'payload' in request.form:
+            body = request.form['payload']
 
             self.__payload = body
             self.channel_id = body['container']['channel_id']
             self.username = body['user']['username']
             self.user_id = body['user']['id']
-        elif body:
-            params = body.split('&')
-
-            for param in params:
-                key, value = param.split('=')
-                self.__payload[key] = unquote(value)
-
+        elif request is not None:
+            self.__payload = request.form
             self.user_id = self.__payload['user_id']
             self.channel_id = self.__payload['channel_id']
             self.username = self.__payload['user_name']
             self.command = self.__payload['command']
-            self.text = self.__payload['text'].replace('+', ' ')
+            self.text = request.text
 
             if 'response_url' in self.__payload:
                 self.response_url = self.__payload['response_url']
 
+    def __call_api(self, api_method, **kwargs):
+        # Time every call per Web API method, e.g. chat.postMessage calls chat_postMessage
+        with span(METRIC_SLACK_API_LATENCY, SlackMethod=api_method):
+            return getattr(self.__client, api_method.replace('.', '_'))(**kwargs)
+
     def get_user_profile(self, user_id):
-        return self.__client.users_profile_get(user=user_id)
+        return self.__call_api('users.profile.get', user=user_id)
 
     def update_app_home(self, user_id, blocks):
-        return self.__client.views_publish(user_id=user_id, view=blocks)
+        return self.__call_api('views.publish', user_id=user_id, view=blocks)
 
-    def __send_message(self, blocks, channel_id, user, ephemeral, text=None):
+    def __send_message(self, blocks, channel_id, user, ephemeral, text=None, thread_ts=None):
         if text is None:
             text = str(blocks)
 
+        # Replies in threads are only sent when there is a thread
+        thread_args = {'thread_ts': thread_ts} if thread_ts is not None else {}
+
         try:
+            if blocks is not None:
+                validate_blocks(blocks)
+
             if ephemeral:
-                return self.__client.chat_postEphemeral(
+                return self.__call_api(
+                    'chat.postEphemeral',
                     channel=channel_id,
                     user=user,
                     blocks=blocks,
-                    text=text
+                    text=text,
+                    **thread_args
                 )
             else:
-                return self.__client.chat_postMessage(
+                return self.__call_api(
+                    'chat.postMessage',
                     channel=channel_id,
                     blocks=blocks,
-                    text=text
+                    text=text,
+                    **thread_args
                 )
         except Exception as e:
             return {
@@ -69,23 +124,23 @@ class SlackManager:
                 "error": str(e)
             }
 
-    def post_message(self, blocks, text=None, channel_id=None, username=None):
+    def post_message(self, blocks, text=None, channel_id=None, username=None, thread_ts=None):
         if channel_id is None:
             channel_id = self.channel_id
 
         if username is None:
             username = self.username
 
-        return self.__send_message(blocks, channel_id, username, False, text=text)
+        return self.__send_message(blocks, channel_id, username, False, text=text, thread_ts=thread_ts)
 
-    def post_ephemeral(self, blocks, text=None, channel_id=None, user_id=None):
+    def post_ephemeral(self, blocks, text=None, channel_id=None, user_id=None, thread_ts=None):
         if channel_id is None:
             channel_id = self.channel_id
 
         if user_id is None:
             user_id = self.user_id
 
-        return self.__send_message(blocks, channel_id, user_id, True, text=text)
+        return self.__send_message(blocks, channel_id, user_id, True, text=text, thread_ts=thread_ts)
 
     def update_message(self, blocks, ts, text=None, channel_id=None):
         if text is None:
@@ -95,7 +150,10 @@ class SlackManager:
             channel_id = self.channel_id
 
         try:
-            return self.__client.chat_update(
+            validate_blocks(blocks)
+
+            return self.__call_api(
+                'chat.update',
                 channel=channel_id,
                 ts=ts,
                 blocks=blocks,
@@ -107,8 +165,17 @@ class SlackManager:
                 "error": str(e)
             }
 
+    def post_thread_messages(self, messages, thread_ts, channel_id=None):
+        # Posts the (blocks, text) messages in order, e.g. the rest of an answer that doesn't fit in a single message
+        responses = []
+
+        for blocks, text in messages:
+            responses.append(self.post_message(blocks, text=text, channel_id=channel_id, thread_ts=thread_ts))
+
+        return responses
+
     def delete_message(self, ts, channel_id=None):
         if channel_id is None:
             channel_id = self.channel_id
 
-        return self.__client.chat_delete(channel=channel_id, ts=ts)
+        return self.__call_api('chat.delete', channel=channel_id, ts=ts)
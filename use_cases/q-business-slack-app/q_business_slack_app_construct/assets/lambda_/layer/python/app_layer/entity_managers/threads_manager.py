@@ -0,0 +1,89 @@
+import os
+import time
+
+from collections import OrderedDict
+from ..utils.aws_utils import get_client
+from ..utils.lambda_utils import get_lambda_env
+from ..constants import *
+
+
+__LRU_MAX_SIZE = int(os.environ.get('THREADS_LRU_MAX_SIZE', 1024))
+
+# Messages in threads that are not conversations are ignored for this long without checking the table again
+__UNKNOWN_THREAD_TTL_SECONDS = 60
+
+# Threads recently read or written by this container, with the time at which they were cached. Unknown threads are
+# cached as None
+__lru = OrderedDict()
+
+
+def __get_threads_table():
+    return os.environ[f'TABLE_THREADS_{get_lambda_env()}']
+
+
+def __get_thread_key(channel_id, thread_ts):
+    return f'{channel_id}|{thread_ts}'
+
+
+def __remember(key, thread):
+    __lru[key] = (thread, time.monotonic())
+    __lru.move_to_end(key)
+
+    if len(__lru) > __LRU_MAX_SIZE:
+        __lru.popitem(last=False)
+
+
+def is_threads_enabled() -> bool:
+    return f'TABLE_THREADS_{get_lambda_env()}' in os.environ
+
+
+# The conversation ids of a thread change with every answer, possibly in another container, so callers that need them
+# must pass consistent=True. The rest of the thread, such as who started it, never changes
+def get_thread(channel_id: str, thread_ts: str, consistent: bool = False):
+    key = __get_thread_key(channel_id, thread_ts)
+
+    if not consistent and key in __lru:
+        thread, cached_at = __lru[key]
+
+        if thread is not None or time.monotonic() - cached_at < __UNKNOWN_THREAD_TTL_SECONDS:
+            __lru.move_to_end(key)
+            return thread
+
+    response = get_client('dynamodb').get_item(
+        TableName=__get_threads_table(),
+        Key={KEY_THREAD_KEY: {'S': key}},
+        ConsistentRead=consistent
+    )
+
+    item = response.get('Item')
+
+    # Expired items may still be returned until DynamoDB deletes them
+    if item is None or int(item[KEY_EXPIRES_AT]['N']) <= time.time():
+        thread = None
+    else:
+        thread = {
+            'conversationId': item[KEY_CONVERSATION_ID]['S'],
+            'parentMessageId': item[KEY_PARENT_MESSAGE_ID]['S'],
+            'userId': item[KEY_USER_ID]['S'] if KEY_USER_ID in item else None
+        }
+
+    __remember(key, thread)
+
+    return thread
+
+
+def put_thread(channel_id: str, thread_ts: str, conversation_id: str, parent_message_id: str, user_id: str = None):
+    key = __get_thread_key(channel_id, thread_ts)
+    item = {
+        KEY_THREAD_KEY: {'S': key},
+        KEY_CONVERSATION_ID: {'S': conversation_id},
+        KEY_PARENT_MESSAGE_ID: {'S': parent_message_id},
+        KEY_EXPIRES_AT: {'N': str(int(time.time()) + int(os.environ['THREADS_TTL_SECONDS']))}
+    }
+
+    if user_id is not None:
+        item[KEY_USER_ID] = {'S': user_id}
+
+    get_client('dynamodb').put_item(TableName=__get_threads_table(), Item=item)
+
+    __remember(key, {'conversationId': conversation_id, 'parentMessageId': parent_message_id, 'userId': user_id})
@@ -1,20 +1,101 @@
-import boto3
 import os
+import random
+import time
 
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from ..utils.aws_utils import get_client
 from ..utils.lambda_utils import get_lambda_env
 from ..constants import *
 
 
-boto3_client = boto3.client('dynamodb')
-boto3_resource = boto3.resource('dynamodb')
+__LRU_MAX_SIZE = int(os.environ.get('USERS_LRU_MAX_SIZE', 1024))
 
+# Maximum number of items per BatchWriteItem and BatchGetItem request
+__BATCH_WRITE_SIZE = 25
+__BATCH_GET_SIZE = 100
 
-def __get_users_table():
-    return os.environ[f'TABLE_USERS_{get_lambda_env()}']
+# Unprocessed items are retried with exponential backoff up to this number of times
+__BATCH_MAX_ATTEMPTS = 8
+__BATCH_BASE_DELAY_SECONDS = 0.05
+
+# Ids of the users that are known to be onboarded. Users are never deleted, so entries don't need to expire
+__known_user_ids = OrderedDict()
+
+
+def __get_users_table(table_name=None):
+    return table_name or os.environ[f'TABLE_USERS_{get_lambda_env()}']
+
+
+def __to_item(user):
+    return {
+        KEY_USERNAME: {'S': user[KEY_USERNAME]},
+        KEY_CHANNEL_ID: {'S': user[KEY_CHANNEL_ID]},
+        KEY_USER_ID: {'S': user[KEY_USER_ID]}
+    }
+
+
+def __from_item(item):
+    return {key: value['S'] for key, value in item.items()}
+
+
+def __chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def __backoff(attempt):
+    # Full jitter, so that parallel workers don't retry in lockstep
+    time.sleep(random.uniform(0, __BATCH_BASE_DELAY_SECONDS * 2 ** attempt))
+
+
+def __write_batch(table, users):
+    request_items = {table: [{'PutRequest': {'Item': __to_item(user)}} for user in users]}
+
+    for attempt in range(__BATCH_MAX_ATTEMPTS):
+        request_items = get_client('dynamodb').batch_write_item(RequestItems=request_items)['UnprocessedItems']
+
+        if not request_items:
+            return
+
+        __backoff(attempt)
+
+    raise RuntimeError(f'{len(request_items[table])} users could not be written to {table}')
+
+
+def __get_batch(table, usernames):
+    request_items = {table: {'Keys': [{KEY_USERNAME: {'S': username}} for username in usernames]}}
+    items = []
+
+    for attempt in range(__BATCH_MAX_ATTEMPTS):
+        response = get_client('dynamodb').batch_get_item(RequestItems=request_items)
+        items.extend(response['Responses'].get(table, []))
+        request_items = response['UnprocessedKeys']
+
+        if not request_items:
+            return items
+
+        __backoff(attempt)
+
+    raise RuntimeError(f'{len(request_items[table]["Keys"])} users could not be read from {table}')
+
+
+def __scan_segment(table, segment, total_segments):
+    paginator = get_client('dynamodb').get_paginator('scan')
+    pages = paginator.paginate(TableName=table, Segment=segment, TotalSegments=total_segments)
+
+    return [item for page in pages for item in page['Items']]
+
+
+def __remember(user_id):
+    __known_user_ids[user_id] = True
+    __known_user_ids.move_to_end(user_id)
+
+    if len(__known_user_ids) > __LRU_MAX_SIZE:
+        __known_user_ids.popitem(last=False)
 
 
 def add_user(username: str, channel_id: str, user_id: str):
-    boto3_client.put_item(
+    get_client('dynamodb').put_item(
         TableName=__get_users_table(),
         Item={
             KEY_USERNAME: {'S': username},
@@ -25,10 +106,94 @@ def add_user(username: str, channel_id: str, user_id: str):
 
 
 def get_user(username: str):
-    table = boto3_resource.Table(__get_users_table())
+    response = get_client('dynamodb').get_item(
+        TableName=__get_users_table(),
+        Key={KEY_USERNAME: {'S': username}}
+    )
+
+    return None if 'Item' not in response else __from_item(response['Item'])
 
-    response = table.get_item(
-        Key={KEY_USERNAME: username}
+
+def is_known_user(user_id: str) -> bool:
+    if user_id in __known_user_ids:
+        __known_user_ids.move_to_end(user_id)
+        return True
+
+    response = get_client('dynamodb').query(
+        TableName=__get_users_table(),
+        IndexName=INDEX_USER_ID,
+        KeyConditionExpression='#user_id = :user_id',
+        ExpressionAttributeNames={'#user_id': KEY_USER_ID},
+        ExpressionAttributeValues={':user_id': {'S': user_id}},
+        Select='COUNT',
+        Limit=1
     )
 
-    return None if 'Item' not in response else response['Item']
+    if response['Count'] == 0:
+        return False
+
+    __remember(user_id)
+
+    return True
+
+
+# Returns True if the user has been added, or False if it already existed
+def add_user_if_new(username: str, channel_id: str, user_id: str) -> bool:
+    try:
+        get_client('dynamodb').put_item(
+            TableName=__get_users_table(),
+            Item={
+                KEY_USERNAME: {'S': username},
+                KEY_CHANNEL_ID: {'S': channel_id},
+                KEY_USER_ID: {'S': user_id}
+            },
+            ConditionExpression='attribute_not_exists(#username)',
+            ExpressionAttributeNames={'#username': KEY_USERNAME}
+        )
+    except get_client('dynamodb').exceptions.ConditionalCheckFailedException:
+        __remember(user_id)
+        return False
+
+    __remember(user_id)
+
+    return True
+
+
+# Users are written in chunks of 25 items, which are sent in parallel. Returns the number of users written
+def add_users(users: list, table_name: str = None, max_workers: int = 8) -> int:
+    table = __get_users_table(table_name)
+
+    # BatchWriteItem rejects duplicated keys, and chunks written in parallel must not race. The last user wins, as it
+    # would if they were written one after the other
+    users = list({user[KEY_USERNAME]: user for user in users}.values())
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(__write_batch, table, chunk) for chunk in __chunks(users, __BATCH_WRITE_SIZE)]
+
+    for future in futures:
+        future.result()
+
+    return len(users)
+
+
+# Users are read in chunks of 100 keys, which are sent in parallel. Users that don't exist are left out
+def get_users(usernames: list, table_name: str = None, max_workers: int = 8) -> list:
+    table = __get_users_table(table_name)
+
+    # BatchGetItem rejects duplicated keys
+    usernames = list(dict.fromkeys(usernames))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda chunk: __get_batch(table, chunk), __chunks(usernames, __BATCH_GET_SIZE))
+
+        return [__from_item(item) for items in results for item in items]
+
+
+# Every segment of the table is scanned by its own worker
+def scan_users(table_name: str = None, total_segments: int = 4) -> list:
+    table = __get_users_table(table_name)
+
+    with ThreadPoolExecutor(max_workers=total_segments) as executor:
+        results = executor.map(lambda segment: __scan_segment(table, segment, total_segments), range(total_segments))
+
+        return [__from_item(item) for items in results for item in items]
@@ -0,0 +1,25 @@
+import importlib
+
+
+# Builds the module level __getattr__ and __dir__ of a package (PEP 562), so that the modules that define its names are
+# only imported when one of those names is first used, and returns them along with the names for __all__
+def lazy_attributes(package_globals, modules):
+    package_name = package_globals['__name__']
+    attributes = {name: module for module, names in modules.items() for name in names}
+
+    def __getattr__(name):
+        if name not in attributes:
+            raise AttributeError(f'module {package_name!r} has no attribute {name!r}')
+
+        module = importlib.import_module(f'.{attributes[name]}', package_name)
+
+        # Some names are modules themselves, e.g. users_manager
+        value = getattr(module, name) if hasattr(module, name) else module
+        package_globals[name] = value
+
+        return value
+
+    def __dir__():
+        return sorted(set(package_globals) | set(attributes))
+
+    return __getattr__, __dir__, list(attributes)
@@ -0,0 +1,8 @@
+from ..lazy_imports import lazy_attributes
+
+
+# Operations defined in a module of the same name, e.g. ask, are imported from their module, since the package can't
+# export a name that is already bound to one of its submodules: from app_layer.operations.ask import ask
+__getattr__, __dir__, __all__ = lazy_attributes(globals(), {
+    'onboarding': ['onboard_user']
+})
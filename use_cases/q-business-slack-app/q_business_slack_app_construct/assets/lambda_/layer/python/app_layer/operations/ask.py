@@ -0,0 +1,37 @@
+from ..entity_managers import answers_manager
+from ..utils.blocks_utils import *
+
+
+def __get_cached_answer(text):
+    if not answers_manager.is_answers_cache_enabled():
+        return None
+
+    # A cache failure must never prevent the question from being answered
+    try:
+        return answers_manager.get_answer(text)
+    except Exception as e:
+        print(f'Unable to read the answers cache: {e}')
+        return None
+
+
+# Returns the timestamp of the processing message that has to be updated with the answer of the model, or None if
+# there is nothing left to do. Follow-up questions are posted in the thread of the conversation
+def ask(manager, text, thread_ts=None):
+    # Reply straight away if the same question has already been answered. Follow-ups depend on the conversation
+    answer = __get_cached_answer(text) if thread_ts is None else None
+
+    if answer is not None:
+        messages = layout_response_blocks(answer['sourceAttributions'], answer['systemMessage'], text)
+        response = manager.post_message(messages[0][0], text=messages[0][1])
+
+        if response['ok']:
+            manager.post_thread_messages(messages[1:], response['ts'])
+
+        return None
+
+    blocks = get_blocks(BLOCK_PROCESSING)
+    blocks[0]['elements'][1]['elements'][0]['text'] = text
+
+    response = manager.post_message(blocks, text='Processing...', thread_ts=thread_ts)
+
+    return response['ts'] if response['ok'] else None
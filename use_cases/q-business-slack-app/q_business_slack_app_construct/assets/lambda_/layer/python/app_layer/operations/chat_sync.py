@@ -0,0 +1,100 @@
+import os
+
+from ..entity_managers import SlackManager, answers_manager, threads_manager
+from ..utils.attributions_utils import process_attributions
+from ..utils.aws_utils import get_client
+from ..utils.blocks_utils import *
+from ..utils.metrics_utils import METRIC_CHAT_SYNC_LATENCY, span
+
+
+def __get_conversation_args(channel_id, thread_ts):
+    if thread_ts is None or not threads_manager.is_threads_enabled():
+        return {}
+
+    # The latest answer in the thread may have been given by another container
+    thread = threads_manager.get_thread(channel_id, thread_ts, consistent=True)
+
+    if thread is None:
+        return {}
+
+    return {'conversationId': thread['conversationId'], 'parentMessageId': thread['parentMessageId']}
+
+
+def __chat(text, conversation_args):
+    return get_client('qbusiness').chat_sync(
+        applicationId=os.environ['APP_ID'],
+        userMessage=text,
+        chatMode='RETRIEVAL_MODE',
+        **conversation_args
+    )
+
+
+def __save_thread(channel_id, thread_ts, response, user_id):
+    if not threads_manager.is_threads_enabled() or not response.get('conversationId'):
+        return
+
+    # Replies in the thread continue the conversation from this answer. Failing to save it must not turn the answer
+    # into an error message
+    try:
+        threads_manager.put_thread(
+            channel_id, thread_ts, response['conversationId'], response['systemMessageId'], user_id
+        )
+    except Exception as e:
+        print(f'Unable to save the conversation of the thread: {e}')
+
+
+# Follow-up questions are asked in the thread_ts thread, whose conversation is continued. Otherwise, the answer starts a
+# thread and a conversation of its own
+def chat_sync(text, ts, channel_id, manager=None, raise_on_throttling=False, thread_ts=None, user_id=None):
+    if manager is None:
+        manager = SlackManager()
+
+    try:
+        conversation_args = __get_conversation_args(channel_id, thread_ts)
+
+        # Perform a query to the LLM
+        with span(METRIC_CHAT_SYNC_LATENCY):
+            response = __chat(text, conversation_args)
+
+        system_message = response['systemMessage']
+
+        # Keep only the most cited sources that users can open, once each
+        source_attributions = process_attributions(response['sourceAttributions'], system_message)
+
+        # Laid out within Slack's limits, so that long answers are not rejected
+        messages = layout_response_blocks(source_attributions, system_message, text)
+
+        slack_response = manager.update_message(
+            blocks=messages[0][0],
+            ts=ts,
+            channel_id=channel_id,
+            text=messages[0][1]
+        )
+
+        if not slack_response['ok']:
+            raise KeyError(slack_response['error'])
+
+        # The rest of the answer, if any, is posted in the thread of the question
+        manager.post_thread_messages(messages[1:], thread_ts or ts, channel_id)
+    except Exception as e:
+        # Let the caller retry throttled questions later instead of replying with an error
+        if raise_on_throttling and isinstance(e, get_client('qbusiness').exceptions.ThrottlingException):
+            raise
+
+        manager.update_message(
+            blocks=build_error_response_blocks(text, e.args[0]),
+            ts=ts,
+            channel_id=channel_id,
+            text=e.args[0]
+        )
+        return
+
+    __save_thread(channel_id, thread_ts or ts, response, user_id)
+
+    # The answer has already been posted, so failing to cache it must not turn it into an error message. Answers to
+    # follow-ups depend on the conversation, so they are not cached
+    if thread_ts is None and answers_manager.is_answers_cache_enabled():
+        try:
+            answers_manager.put_answer(text, system_message, source_attributions)
+        except Exception as e:
+            print(f'Unable to cache the answer: {e}')
@@ -0,0 +1,5 @@
+from ..utils.blocks_utils import *
+
+
+def display_help(manager):
+    return manager.post_ephemeral(get_blocks(BLOCK_HELP), text='Application help')
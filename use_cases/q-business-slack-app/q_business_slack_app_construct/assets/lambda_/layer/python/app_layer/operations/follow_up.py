@@ -0,0 +1,32 @@
+from ..entity_managers import threads_manager
+from ..utils.lambda_utils import get_lambda_env
+from ..utils.operations_index import get_operation
+from ..utils.slack_operations_definition import OP_ASK
+from ..utils.slack_utils import check_rate_limits
+from .ask import ask
+
+
+# Returns the timestamp of the processing message posted in the thread, or None if the message is not a follow-up
+# question of a conversation
+def follow_up(manager, text, thread_ts):
+    if not threads_manager.is_threads_enabled():
+        return None
+
+    env = get_lambda_env()
+    operation = get_operation(env, OP_ASK)
+    thread = threads_manager.get_thread(manager.channel_id, thread_ts)
+
+    if operation is None or thread is None:
+        return None
+
+    # Unless anyone can ask questions, only the user who asked the first question can continue the conversation
+    if not operation.allow_all_users and thread['userId'] != manager.user_id:
+        return None
+
+    try:
+        check_rate_limits(operation, manager.user_id, manager.channel_id, env)
+    except ValueError as e:
+        manager.post_ephemeral(None, text=e.args[0], thread_ts=thread_ts)
+        return None
+
+    return ask(manager, text, thread_ts)
@@ -0,0 +1,22 @@
+from ..entity_managers import SlackManager, users_manager
+from ..utils.blocks_utils import *
+
+
+def onboard_user(user_id, channel_id):
+    # Returning users are found in the container cache or by their id, without calling Slack
+    if users_manager.is_known_user(user_id):
+        return
+
+    slack = SlackManager()
+
+    response = slack.get_user_profile(user_id)
+    username = response['profile']['email'].split('@')[0]
+
+    # New user. The conditional write makes sure that concurrent events only onboard the user once
+    if users_manager.add_user_if_new(username, channel_id, user_id):
+        # Send welcome message
+        blocks = get_blocks(BLOCK_ONBOARDING)
+        slack.post_message(blocks, blocks[0]['text']['text'], channel_id)
+
+        # Configure app home
+        slack.update_app_home(user_id, get_blocks(BLOCK_HOME))
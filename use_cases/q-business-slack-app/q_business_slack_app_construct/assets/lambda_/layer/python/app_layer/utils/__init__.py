@@ -1,3 +1,27 @@
-from .slack_utils import *
-from .lambda_utils import *
-from .secrets_manager_utils import *
+from ..lazy_imports import lazy_attributes
+
+
+__getattr__, __dir__, __all__ = lazy_attributes(globals(), {
+    'slack_utils': ['validate_command', 'verify_slack_request', 'deduplicate_slack_request', 'check_rate_limits'],
+    'slack_operations_definition': ['SLASH_COMMAND', 'OP_ASK', 'OP_HELP', 'OPTION_DEV', 'OP_DEFINITION'],
+    'operations_index': ['Operation', 'OPERATIONS', 'get_operation', 'is_user_allowed'],
+    'slack_request': ['parse_slash_command', 'SlackRequest', 'slack_request_handler'],
+    'lambda_utils': ['get_lambda_env'],
+    'aws_utils': ['get_client'],
+    'secrets_manager_utils': ['get_secret_value', 'invalidate_secrets', 'get_secrets_cache_stats'],
+    'blocks_utils': [
+        'BLOCK_PROCESSING', 'BLOCK_HELP', 'BLOCK_ONBOARDING', 'BLOCK_HOME', 'BLOCK_RESPONSE', 'BLOCK_ERROR_RESPONSE',
+        'BLOCK_DIVIDER', 'BLOCK_SOURCES', 'BLOCK_SOURCE', 'MAX_BLOCKS', 'MAX_HEADER_TEXT_LENGTH',
+        'MAX_SECTION_TEXT_LENGTH', 'MAX_MESSAGE_TEXT_LENGTH', 'get_blocks', 'split_text', 'layout_response_blocks',
+        'build_response_blocks', 'build_error_response_blocks', 'validate_blocks'
+    ],
+    'metrics_utils': [
+        'METRIC_COLD_START', 'METRIC_DURATION', 'METRIC_SECRETS_FETCH_TIME', 'METRIC_SLACK_API_LATENCY',
+        'METRIC_CHAT_SYNC_LATENCY', 'METRIC_BLOCKS_BUILD_TIME', 'METRIC_DUPLICATE_REQUESTS',
+        'METRIC_RATE_LIMITED_REQUESTS', 'METRIC_RATE_LIMITER_ERRORS', 'UNIT_MILLISECONDS', 'UNIT_COUNT', 'record_metric',
+        'span', 'timed', 'flush_metrics', 'reset_cold_start', 'instrument_handler'
+    ],
+    'snap_start_utils': ['register_snapshot_hooks'],
+    'attributions_definition': ['ATTRIBUTIONS_DEFINITION'],
+    'attributions_utils': ['AttributionFilter', 'ATTRIBUTION_FILTERS', 'canonicalize_url', 'process_attributions']
+})
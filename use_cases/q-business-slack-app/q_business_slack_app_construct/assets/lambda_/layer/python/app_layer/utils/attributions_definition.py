@@ -0,0 +1,23 @@
+from ..constants import Env
+
+
+# Sources of each answer are filtered, deduplicated by their canonical URL and ranked by the number of times they are
+# cited and by how relevant their snippets are to the answer. Sources whose URL starts with one of 'excludePrefixes' or
+# matches one of the 'excludePatterns' regular expressions are never shown. Documents uploaded to the data source
+# bucket of the application are always excluded, as users can't open them
+# Query parameters in 'ignoredQueryParameters' don't change the page, so they are removed from the URLs. Names ending
+# with '*' are prefixes
+ATTRIBUTIONS_DEFINITION = {
+    Env.DEV.value: {
+        'maxSources': 3,
+        'excludePrefixes': [],
+        'excludePatterns': [],
+        'ignoredQueryParameters': ['utm_*', 'fbclid', 'gclid'],
+    },
+    Env.PROD.value: {
+        'maxSources': 3,
+        'excludePrefixes': [],
+        'excludePatterns': [],
+        'ignoredQueryParameters': ['utm_*', 'fbclid', 'gclid'],
+    }
+}
@@ -0,0 +1,107 @@
+import heapq
+import os
+import re
+
+from collections import namedtuple
+from types import MappingProxyType
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from .attributions_definition import *
+from .lambda_utils import get_lambda_env
+
+
+__DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+__WORD = re.compile(r'\w+')
+
+AttributionFilter = namedtuple('AttributionFilter', [
+    'max_sources', 'exclude_prefixes', 'exclude_pattern', 'ignored_parameters', 'ignored_parameter_prefixes'
+])
+
+
+def __compile_filter(definition):
+    exclude_prefixes = list(definition['excludePrefixes'])
+
+    if os.environ.get('BUCKET_NAME'):
+        exclude_prefixes.append(f'https://{os.environ["BUCKET_NAME"]}')
+
+    # A single alternation is matched in one pass, whatever the number of patterns
+    patterns = definition['excludePatterns']
+    ignored_parameters = definition['ignoredQueryParameters']
+
+    return AttributionFilter(
+        max_sources=definition['maxSources'],
+        exclude_prefixes=tuple(exclude_prefixes),
+        exclude_pattern=re.compile('|'.join(f'(?:{p})' for p in patterns)) if patterns else None,
+        ignored_parameters=frozenset(p for p in ignored_parameters if not p.endswith('*')),
+        ignored_parameter_prefixes=tuple(p[:-1] for p in ignored_parameters if p.endswith('*'))
+    )
+
+
+ATTRIBUTION_FILTERS = MappingProxyType({
+    env: __compile_filter(definition) for env, definition in ATTRIBUTIONS_DEFINITION.items()
+})
+
+
+def canonicalize_url(url, attribution_filter):
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+
+    if parts.port is not None and parts.port != __DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name not in attribution_filter.ignored_parameters and
+        not name.startswith(attribution_filter.ignored_parameter_prefixes)
+    )
+
+    # Fragments point to a section of the same page
+    return urlunsplit((scheme, host, parts.path.rstrip('/') or '/', urlencode(query), ''))
+
+
+def __is_excluded(url, attribution_filter):
+    return url.startswith(attribution_filter.exclude_prefixes) or (
+        attribution_filter.exclude_pattern is not None and attribution_filter.exclude_pattern.search(url) is not None
+    )
+
+
+def __get_relevance(attribution, answer_words):
+    # Share of the words of the snippet that are also in the answer
+    snippet_words = set(__WORD.findall(attribution.get('snippet', '').lower()))
+
+    return len(snippet_words & answer_words) / len(snippet_words) if snippet_words else 0
+
+
+def process_attributions(attributions, system_message, env=None):
+    attribution_filter = ATTRIBUTION_FILTERS[env or get_lambda_env()]
+    answer_words = set(__WORD.findall(system_message.lower()))
+
+    # Canonical URL of each source, with its first attribution, number of citations, best relevance and position
+    sources = {}
+
+    for position, attribution in enumerate(attributions):
+        url = attribution.get('url')
+
+        if not url or __is_excluded(url, attribution_filter):
+            continue
+
+        canonical_url = canonicalize_url(url, attribution_filter)
+
+        # Each attribution covers the segments of the answer that cite it
+        citations = len(attribution.get('textMessageSegments') or []) or 1
+        relevance = __get_relevance(attribution, answer_words)
+
+        if canonical_url in sources:
+            source = sources[canonical_url]
+            source[1] += citations
+            source[2] = max(source[2], relevance)
+        else:
+            sources[canonical_url] = [attribution, citations, relevance, position]
+
+    # Ties keep the order of the attributions
+    ranked = heapq.nsmallest(
+        attribution_filter.max_sources, sources.values(), key=lambda source: (-source[1], -source[2], source[3])
+    )
+
+    return [source[0] for source in ranked]
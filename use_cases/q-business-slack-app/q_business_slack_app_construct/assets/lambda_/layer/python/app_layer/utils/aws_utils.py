@@ -0,0 +1,51 @@
+import os
+import threading
+
+
+__CONNECT_TIMEOUT_SECONDS = 2
+__READ_TIMEOUT_SECONDS = 10
+
+# Services whose calls may legitimately take longer than the default read timeout
+__READ_TIMEOUTS_SECONDS = {
+    'qbusiness': 60
+}
+
+# Enough connections for the threads that process a batch of questions in parallel
+__MAX_POOL_CONNECTIONS = int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', 32))
+
+__session = None
+__clients = {}
+__lock = threading.Lock()
+
+
+def __get_config(service_name):
+    from botocore.config import Config
+
+    return Config(
+        connect_timeout=__CONNECT_TIMEOUT_SECONDS,
+        read_timeout=__READ_TIMEOUTS_SECONDS.get(service_name, __READ_TIMEOUT_SECONDS),
+        max_pool_connections=__MAX_POOL_CONNECTIONS,
+        retries={'mode': 'adaptive', 'max_attempts': 3},
+        tcp_keepalive=True
+    )
+
+
+# Clients are created on first use and shared by the whole container. Creating them is not thread safe, so it's done
+# with a lock, but the clients themselves can be shared across threads
+def get_client(service_name):
+    global __session
+
+    if service_name in __clients:
+        return __clients[service_name]
+
+    with __lock:
+        if service_name not in __clients:
+            if __session is None:
+                # boto3 takes a while to import, so functions that never call AWS don't pay for it at cold start
+                import boto3
+
+                __session = boto3.session.Session()
+
+            __clients[service_name] = __session.client(service_name, config=__get_config(service_name))
+
+        return __clients[service_name]
@@ -0,0 +1,154 @@
+import json
+import os
+
+from .metrics_utils import METRIC_BLOCKS_BUILD_TIME, timed
+
+
+BLOCK_PROCESSING = 'processing.json'
+BLOCK_HELP = 'help.json'
+BLOCK_ONBOARDING = 'onboarding.json'
+BLOCK_HOME = 'home.json'
+BLOCK_RESPONSE = 'response.json'
+BLOCK_ERROR_RESPONSE = 'error_response.json'
+BLOCK_DIVIDER = 'divider.json'
+BLOCK_SOURCES = 'sources.json'
+BLOCK_SOURCE = 'source.json'
+
+# Slack rejects messages over these limits, see https://api.slack.com/reference/block-kit/blocks
+MAX_BLOCKS = 50
+MAX_HEADER_TEXT_LENGTH = 150
+MAX_SECTION_TEXT_LENGTH = 3000
+MAX_MESSAGE_TEXT_LENGTH = 40000
+
+__TEXT_LIMITS = {'header': MAX_HEADER_TEXT_LENGTH, 'section': MAX_SECTION_TEXT_LENGTH}
+
+# Long texts are split at the last paragraph, line, sentence or word break that fits in a block
+__BREAKS = ['\n\n', '\n', '. ', ' ']
+
+__BLOCKS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'blocks')
+
+# Parsed templates, loaded once per container and never handed out directly
+__templates = {}
+
+
+def __load_template(name):
+    with open(os.path.join(__BLOCKS_PATH, name)) as fd:
+        return json.load(fd)
+
+
+def __copy(value):
+    # Templates only contain JSON types, so a structural copy is much cheaper than copy.deepcopy
+    if isinstance(value, dict):
+        return {k: __copy(v) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [__copy(v) for v in value]
+
+    return value
+
+
+def get_blocks(name):
+    if name not in __templates:
+        __templates[name] = __load_template(name)
+
+    return __copy(__templates[name])
+
+
+def __build_source_block(source_name, source_url):
+    block = get_blocks(BLOCK_SOURCE)
+    block['elements'][0]['url'] = source_url
+    block['elements'][0]['text'] = source_name
+
+    return block
+
+
+def __truncate(text, max_length):
+    return text if len(text) <= max_length else text[:max_length - 1] + '…'
+
+
+def split_text(text, max_length=MAX_SECTION_TEXT_LENGTH):
+    chunks = []
+    start = 0
+
+    while len(text) - start > max_length:
+        end = start + max_length
+
+        for separator in __BREAKS:
+            position = text.rfind(separator, start, end - len(separator) + 1)
+
+            if position > start:
+                end = position + len(separator)
+                break
+
+        chunks.append(text[start:end])
+        start = end
+
+    chunks.append(text[start:])
+
+    return chunks
+
+
+def __build_sources_blocks(source_attributions):
+    blocks = [get_blocks(BLOCK_DIVIDER), get_blocks(BLOCK_SOURCES)]
+
+    for a in source_attributions:
+        blocks[-1]['elements'][1]['elements'].append(
+            __build_source_block(a['title'], a['url'])
+        )
+
+    return blocks
+
+
+# Returns the blocks and the notification text of each message needed to post the answer. The first one replies to the
+# question, and the rest, if the answer doesn't fit in a single message, are meant to be posted in its thread
+@timed(METRIC_BLOCKS_BUILD_TIME)
+def layout_response_blocks(source_attributions, system_message, text):
+    header, section = get_blocks(BLOCK_RESPONSE)
+    header['text']['text'] = __truncate(text, MAX_HEADER_TEXT_LENGTH)
+
+    # Blocks that must be in the same message
+    units = []
+
+    for chunk in split_text(system_message):
+        block = __copy(section)
+        block['text']['text'] = chunk
+        units.append(([block], chunk))
+
+    if source_attributions:
+        units.append((__build_sources_blocks(source_attributions), ''))
+
+    messages = [([header], [])]
+
+    for blocks, unit_text in units:
+        if len(messages[-1][0]) + len(blocks) > MAX_BLOCKS:
+            messages.append(([], []))
+
+        messages[-1][0].extend(blocks)
+        messages[-1][1].append(unit_text)
+
+    return [(blocks, __truncate(''.join(texts), MAX_MESSAGE_TEXT_LENGTH)) for blocks, texts in messages]
+
+
+# Blocks of the first message of the answer, see layout_response_blocks
+def build_response_blocks(source_attributions, system_message, text):
+    return layout_response_blocks(source_attributions, system_message, text)[0][0]
+
+
+def validate_blocks(blocks):
+    # Catches the messages that Slack would reject before calling it
+    if len(blocks) > MAX_BLOCKS:
+        raise ValueError(f'invalid_blocks: {len(blocks)} blocks exceed the limit of {MAX_BLOCKS}')
+
+    for block in blocks:
+        limit = __TEXT_LIMITS.get(block['type'])
+
+        if limit is not None and 'text' in block and len(block['text']['text']) > limit:
+            raise ValueError(f'invalid_blocks: {block["type"]} text exceeds the limit of {limit} characters')
+
+
+@timed(METRIC_BLOCKS_BUILD_TIME)
+def build_error_response_blocks(text, error):
+    blocks = get_blocks(BLOCK_ERROR_RESPONSE)
+    blocks[0]['elements'][0]['elements'][1]['text'] = error
+    blocks[0]['elements'][1]['elements'][0]['text'] = text
+
+    return blocks
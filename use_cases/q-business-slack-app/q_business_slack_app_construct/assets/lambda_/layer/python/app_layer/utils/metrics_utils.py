@@ -0,0 +1,126 @@
+import functools
+import json
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+from .lambda_utils import get_lambda_env
+from .secrets_manager_utils import get_secrets_cache_stats
+
+
+METRIC_COLD_START = 'ColdStart'
+METRIC_DURATION = 'Duration'
+METRIC_SECRETS_FETCH_TIME = 'SecretsFetchTime'
+METRIC_SLACK_API_LATENCY = 'SlackApiLatency'
+METRIC_CHAT_SYNC_LATENCY = 'ChatSyncLatency'
+METRIC_BLOCKS_BUILD_TIME = 'BlocksBuildTime'
+METRIC_DUPLICATE_REQUESTS = 'DuplicateRequests'
+METRIC_RATE_LIMITED_REQUESTS = 'RateLimitedRequests'
+METRIC_RATE_LIMITER_ERRORS = 'RateLimiterErrors'
+
+UNIT_MILLISECONDS = 'Milliseconds'
+UNIT_COUNT = 'Count'
+
+__NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'QBusinessSlackApp')
+
+# CloudWatch only accepts up to this number of values per metric in each EMF document
+__MAX_VALUES = 100
+
+__cold_start = True
+
+# Values recorded during the current invocation, grouped by their extra dimensions and then by metric name
+__metrics = {}
+__lock = threading.Lock()
+
+
+def record_metric(name, value, unit=UNIT_MILLISECONDS, **dimensions):
+    key = tuple(sorted(dimensions.items()))
+
+    with __lock:
+        metric = __metrics.setdefault(key, {}).setdefault(name, (unit, []))
+        metric[1].append(value)
+
+
+@contextmanager
+def span(name, **dimensions):
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        record_metric(name, (time.perf_counter() - start) * 1000, UNIT_MILLISECONDS, **dimensions)
+
+
+def timed(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def inner_function(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return inner_function
+
+    return decorator
+
+
+def __build_documents(function_name):
+    with __lock:
+        metrics = dict(__metrics)
+        __metrics.clear()
+
+    timestamp = int(time.time() * 1000)
+
+    for key, values_by_name in metrics.items():
+        dimensions = {'FunctionName': function_name, 'Env': get_lambda_env(), **dict(key)}
+        document = {
+            '_aws': {
+                'Timestamp': timestamp,
+                'CloudWatchMetrics': [{
+                    'Namespace': __NAMESPACE,
+                    'Dimensions': [list(dimensions)],
+                    'Metrics': [{'Name': name, 'Unit': unit} for name, (unit, _) in values_by_name.items()]
+                }]
+            },
+            **dimensions
+        }
+
+        for name, (_, values) in values_by_name.items():
+            document[name] = values[0] if len(values) == 1 else values[:__MAX_VALUES]
+
+        yield document
+
+
+def flush_metrics(function_name):
+    # Lambda sends stdout to CloudWatch Logs, which extracts the metrics without any extra API call
+    for document in __build_documents(function_name):
+        print(json.dumps(document))
+
+
+def reset_cold_start():
+    # The first invocation of an environment restored from a SnapStart snapshot is a cold start too
+    global __cold_start
+    __cold_start = True
+
+
+def instrument_handler(func):
+    @functools.wraps(func)
+    def inner_function(event, context, *args, **kwargs):
+        global __cold_start
+
+        cold_start = __cold_start
+        __cold_start = False
+
+        secrets_fetch_time = get_secrets_cache_stats()['fetchTimeMs']
+        start = time.perf_counter()
+
+        try:
+            return func(event, context, *args, **kwargs)
+        finally:
+            record_metric(METRIC_DURATION, (time.perf_counter() - start) * 1000)
+            record_metric(METRIC_COLD_START, int(cold_start), UNIT_COUNT)
+            record_metric(METRIC_SECRETS_FETCH_TIME, get_secrets_cache_stats()['fetchTimeMs'] - secrets_fetch_time)
+
+            flush_metrics(getattr(context, 'function_name', os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local')))
+
+    return inner_function
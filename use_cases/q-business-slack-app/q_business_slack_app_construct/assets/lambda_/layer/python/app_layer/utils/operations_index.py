@@ -0,0 +1,130 @@
+import time
+
+from collections import OrderedDict, namedtuple
+from types import MappingProxyType
+from urllib.parse import urlparse
+from .aws_utils import get_client
+from .slack_operations_definition import *
+from ..constants import *
+
+
+__MISSING_OPTION_ERROR_MESSAGE = "Missing required option \"{}\" for operation \"{}\"."
+
+# Allow-lists can be stored in S3, as s3://bucket/key, or in a DynamoDB table keyed by username, as dynamodb://table
+__ALLOW_LIST_SCHEMES = ['s3', 'dynamodb']
+__DEFAULT_ALLOW_LIST_TTL_SECONDS = 300
+__ALLOW_LIST_LRU_MAX_SIZE = 4096
+
+# OP_DEFINITION compiled once per container, so that validating a command takes the same time whatever the size of the
+# allow-lists
+Operation = namedtuple('Operation', [
+    'name', 'min_question_length', 'required_options', 'accepted_options', 'allow_all_users', 'allowed_users',
+    'allowed_users_source', 'allowed_users_ttl_seconds', 'rate_limit'
+])
+
+# Allow-lists loaded from S3, by source, with the time at which they were loaded
+__s3_allow_lists = {}
+
+# Users looked up in DynamoDB allow-lists, by source and username, with whether they are allowed and the lookup time
+__dynamodb_allowed_users = OrderedDict()
+
+
+def __compile_operation(name, definition):
+    allowed_users = frozenset(definition.get('allowedUsers', []))
+    allowed_users_source = definition.get('allowedUsersSource')
+    rate_limit = definition.get('rateLimit', {})
+
+    if allowed_users_source is not None and urlparse(allowed_users_source).scheme not in __ALLOW_LIST_SCHEMES:
+        raise ValueError(f'Unsupported allow-list source {allowed_users_source} for operation {name}')
+
+    return Operation(
+        name=name,
+        min_question_length=definition.get('minQuestionLength'),
+        # The error message of each required option is built upfront
+        required_options=tuple(
+            (option, __MISSING_OPTION_ERROR_MESSAGE.format(option, name)) for option in definition['requiredOptions']
+        ),
+        accepted_options=frozenset(definition['acceptedOptions']),
+        allow_all_users='*' in allowed_users,
+        allowed_users=allowed_users,
+        allowed_users_source=allowed_users_source,
+        allowed_users_ttl_seconds=definition.get('allowedUsersTtlSeconds', __DEFAULT_ALLOW_LIST_TTL_SECONDS),
+        rate_limit=MappingProxyType({
+            scope: (limit['capacity'], limit['refillSeconds']) for scope, limit in rate_limit.items()
+        })
+    )
+
+
+def __compile(op_definition):
+    return MappingProxyType({
+        env: MappingProxyType({name: __compile_operation(name, definition) for name, definition in operations.items()})
+        for env, operations in op_definition.items()
+    })
+
+
+OPERATIONS = __compile(OP_DEFINITION)
+
+
+def __load_s3_allow_list(bucket, key):
+    body = get_client('s3').get_object(Bucket=bucket, Key=key)['Body'].read().decode('utf-8')
+
+    # One username per line
+    return frozenset(line.strip() for line in body.splitlines() if line.strip())
+
+
+def __is_in_s3_allow_list(source, url, username, ttl_seconds):
+    allow_list, loaded_at = __s3_allow_lists.get(source, (None, 0))
+
+    if time.monotonic() - loaded_at >= ttl_seconds:
+        try:
+            allow_list = __load_s3_allow_list(url.netloc, url.path.lstrip('/'))
+            __s3_allow_lists[source] = (allow_list, time.monotonic())
+        except Exception as e:
+            # Keep using the previous allow-list, if any, until it can be loaded again
+            print(f'Unable to load the allow-list {source}: {e}')
+
+    return allow_list is not None and username in allow_list
+
+
+def __is_in_dynamodb_allow_list(source, url, username, ttl_seconds):
+    key = (source, username)
+
+    if key in __dynamodb_allowed_users and time.monotonic() - __dynamodb_allowed_users[key][1] < ttl_seconds:
+        __dynamodb_allowed_users.move_to_end(key)
+        return __dynamodb_allowed_users[key][0]
+
+    response = get_client('dynamodb').get_item(
+        TableName=url.netloc,
+        Key={KEY_USERNAME: {'S': username}},
+        ProjectionExpression='#username',
+        ExpressionAttributeNames={'#username': KEY_USERNAME}
+    )
+
+    __dynamodb_allowed_users[key] = ('Item' in response, time.monotonic())
+    __dynamodb_allowed_users.move_to_end(key)
+
+    if len(__dynamodb_allowed_users) > __ALLOW_LIST_LRU_MAX_SIZE:
+        __dynamodb_allowed_users.popitem(last=False)
+
+    return __dynamodb_allowed_users[key][0]
+
+
+def get_operation(env: str, name: str):
+    return OPERATIONS[env].get(name)
+
+
+def is_user_allowed(operation: Operation, username: str) -> bool:
+    if operation.allow_all_users or username in operation.allowed_users:
+        return True
+
+    source = operation.allowed_users_source
+
+    if source is None:
+        return False
+
+    url = urlparse(source)
+
+    if url.scheme == 's3':
+        return __is_in_s3_allow_list(source, url, username, operation.allowed_users_ttl_seconds)
+
+    return __is_in_dynamodb_allow_list(source, url, username, operation.allowed_users_ttl_seconds)
@@ -1,10 +1,79 @@
-import boto3
+import os
+import threading
+import time
 
+from .aws_utils import get_client
+from ..constants import *
 
-client = boto3.client('secretsmanager')
+
+# Secrets are fetched lazily on first use and kept for the lifetime of the container, refreshing them once they expire
+__TTL_SECONDS = int(os.environ.get('SECRETS_TTL_SECONDS', 900))
+
+# Secrets that are fetched together in a single call whenever any of them is requested
+__PREFETCHED_SECRETS = [SECRET_SLACK_TOKEN, SECRET_SLACK_SIGNING_SECRET]
+
+__cache = {}
+__lock = threading.Lock()
+__stats = {
+    'hits': 0,
+    'misses': 0,
+    'fetches': 0,
+    'fetchTimeMs': 0.0
+}
+
+
+def __fetch_secrets(secret_names):
+    start = time.perf_counter()
+
+    try:
+        if len(secret_names) == 1:
+            response = get_client('secretsmanager').get_secret_value(SecretId=secret_names[0])
+            return {response['Name']: response['SecretString']}
+
+        response = get_client('secretsmanager').batch_get_secret_value(SecretIdList=secret_names)
+
+        if response['Errors']:
+            raise KeyError(response['Errors'][0]['Message'])
+
+        return {secret['Name']: secret['SecretString'] for secret in response['SecretValues']}
+    finally:
+        __stats['fetches'] += 1
+        __stats['fetchTimeMs'] += (time.perf_counter() - start) * 1000
+
+
+def __is_fresh(secret_name, now):
+    return secret_name in __cache and __cache[secret_name][1] > now
 
 
 def get_secret_value(secret_name):
-    return client.get_secret_value(
-        SecretId=secret_name
-    )['SecretString']
+    now = time.monotonic()
+
+    # The statistics are only updated under the lock, as are the secrets, so that concurrent calls don't lose counts
+    with __lock:
+        if __is_fresh(secret_name, now):
+            __stats['hits'] += 1
+            return __cache[secret_name][0]
+
+        __stats['misses'] += 1
+
+        # Refresh every expired prefetched secret along with the requested one
+        secret_names = [secret_name] + [
+            name for name in __PREFETCHED_SECRETS if name != secret_name and not __is_fresh(name, now)
+        ]
+
+        expires_at = time.monotonic() + __TTL_SECONDS
+
+        for name, value in __fetch_secrets(secret_names).items():
+            __cache[name] = (value, expires_at)
+
+        return __cache[secret_name][0]
+
+
+def invalidate_secrets():
+    with __lock:
+        __cache.clear()
+
+
+def get_secrets_cache_stats() -> dict:
+    with __lock:
+        return dict(__stats)
@@ -10,6 +10,11 @@ OP_HELP = 'help'
 OPTION_DEV = '--dev'
 
 # TODO: add allowed users. Use a wildcard '*' to allow-list all users
+# Large allow-lists can be loaded with 'allowedUsersSource', either from an S3 object with one username per line, as
+# 's3://bucket/key', or from a DynamoDB table keyed by username, as 'dynamodb://table'. They are cached for
+# 'allowedUsersTtlSeconds' (5 minutes by default)
+# Operations can be rate limited per user and per channel with token buckets, which hold up to 'capacity' requests and
+# get a new one every 'refillSeconds'
 OP_DEFINITION = {
     Env.DEV.value: {
         OP_HELP: {
@@ -35,6 +40,10 @@ OP_DEFINITION = {
             'requiredOptions': [],
             'acceptedOptions': [OPTION_DEV],
             'allowedUsers': ['*'],
+            'rateLimit': {
+                'user': {'capacity': 5, 'refillSeconds': 60},
+                'channel': {'capacity': 20, 'refillSeconds': 15},
+            },
         }
     }
 }
\ No newline at end of file
@@ -0,0 +1,82 @@
+import json
+import shlex
+
+from urllib.parse import parse_qsl
+from .slack_operations_definition import *
+from ..constants import *
+
+
+def parse_slash_command(text):
+    tokens = shlex.split(text)
+
+    args = [arg for arg in tokens if not arg.startswith('--')]
+    operation = args.pop(0) if args else None
+
+    # Build key-value pairs with the options
+    options = [arg for arg in tokens if arg.startswith('--')]
+    options = {
+        op if '=' not in op else op.split('=')[0]: '' if '=' not in op else op.split('=')[1]
+        for op in options
+    }
+
+    return operation, args, options
+
+
+class SlackRequest:
+    # Parsed view of a request sent by Slack, shared by the decorators and the handler so that it's only parsed once
+    def __init__(self, event):
+        self.event = event
+        self.body = event['body']
+        self.headers = event.get('headers') or {}
+        self.verified = False
+        self.__form = None
+        self.__command = None
+
+    @property
+    def form(self) -> dict:
+        if self.__form is None:
+            self.__form = dict(parse_qsl(self.body, keep_blank_values=True))
+
+            # Interactivity requests carry a JSON payload
+            if 'payload' in self.__form:
+                self.__form['payload'] = json.loads(self.__form['payload'])
+
+        return self.__form
+
+    @property
+    def text(self) -> str:
+        return self.form.get('text', '')
+
+    @property
+    def command(self) -> tuple:
+        if self.__command is None:
+            self.__command = parse_slash_command(self.text)
+
+        return self.__command
+
+    @property
+    def operation(self):
+        return self.command[0]
+
+    @property
+    def args(self) -> list:
+        return self.command[1]
+
+    @property
+    def options(self) -> dict:
+        return self.command[2]
+
+    @property
+    def env(self) -> str:
+        return Env.DEV.value if OPTION_DEV in self.options else Env.PROD.value
+
+    def get_header(self, name):
+        return self.headers.get(name, self.headers.get(name.lower()))
+
+
+def slack_request_handler(func):
+    # Lets decorators be stacked in any order: the outermost one builds the request and the rest reuse it
+    def inner_function(event, context, request=None):
+        return func(event, context, request if request is not None else SlackRequest(event))
+
+    return inner_function
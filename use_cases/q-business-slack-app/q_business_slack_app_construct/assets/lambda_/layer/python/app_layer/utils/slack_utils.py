@@ -1,90 +1,94 @@
 import json
-import shlex
 import hmac
 import hashlib
+import math
 import time
 
+from .aws_utils import get_client
+from .operations_index import get_operation, is_user_allowed
 from .slack_operations_definition import *
-from ..entity_managers import SlackManager
+from .slack_request import *
+from .metrics_utils import (
+    METRIC_DUPLICATE_REQUESTS, METRIC_RATE_LIMITED_REQUESTS, METRIC_RATE_LIMITER_ERRORS, UNIT_COUNT, record_metric
+)
 from ..constants import *
+from ..entity_managers import idempotency_manager, rate_limits_manager
 from ..utils.secrets_manager_utils import *
 
 
-__ENV = Env.PROD
-
 __INPUT_ERROR_MESSAGE = f'Invalid input. To view the list of available operations, type {SLASH_COMMAND} {OP_HELP}.'
 __PERMISSIONS_ERROR_MESSAGE = "You don't have permission to access this resource."
 __UNRECOGNISED_OPTION_ERROR_MESSAGE = "Unrecognized option \"{}\" for operation \"{}\"."
-__MISSING_OPTION_ERROR_MESSAGE = "Missing required option \"{}\" for operation \"{}\"."
 __OP_HELP_ERROR_MESSAGE = f'The "{OP_HELP}" operation does not accept any arguments. Simply type {SLASH_COMMAND} {OP_HELP}.'
 __OP_ASK_ERROR_MESSAGE = f'The "{OP_ASK}" operation accepts a single argument, which is the question you want to ask wrapped in double quotes. For instance, {SLASH_COMMAND} {OP_ASK} "[Your question]".'
 __OP_ASK_LENGTH_ERROR_MESSAGE = 'The input text is too short.'
-
-__SIGNING_SECRET = get_secret_value("SlackSigningSecret")
+__RATE_LIMIT_ERROR_MESSAGES = {
+    'user': 'You have sent too many "{}" requests. Please try again in {} seconds.',
+    'channel': 'Too many "{}" requests have been sent in this channel. Please try again in {} seconds.'
+}
 
 
 def __validate_operation_args(operation, args, options):
-    if operation == OP_HELP:
+    if operation.name == OP_HELP:
         if args:
             raise ValueError(__OP_HELP_ERROR_MESSAGE)
-    elif operation == OP_ASK:
+    elif operation.name == OP_ASK:
         if len(args) != 1:
             raise ValueError(__OP_ASK_ERROR_MESSAGE)
-        elif len(args[0]) < OP_DEFINITION[__ENV.value][OP_ASK]['minQuestionLength'] + 2:
+        elif len(args[0]) < operation.min_question_length + 2:
             raise ValueError(__OP_ASK_LENGTH_ERROR_MESSAGE)
 
     for key in options:
-        if key not in OP_DEFINITION[__ENV.value][operation]['acceptedOptions']:
-            raise ValueError(__UNRECOGNISED_OPTION_ERROR_MESSAGE.format(key, operation))
+        if key not in operation.accepted_options:
+            raise ValueError(__UNRECOGNISED_OPTION_ERROR_MESSAGE.format(key, operation.name))
 
-    for req_option in OP_DEFINITION[__ENV.value][operation]['requiredOptions']:
+    for req_option, error_message in operation.required_options:
         if req_option not in options:
-            raise ValueError(__MISSING_OPTION_ERROR_MESSAGE.format(req_option, operation))
-
-
-def __set_env(options):
-    global __ENV
-
-    if OPTION_DEV in options:
-        __ENV = Env.DEV
-
-
-def get_slack_env() -> str:
-    return __ENV.value
+            raise ValueError(error_message)
 
 
-def parse_slash_command(text):
-    tokens = shlex.split(text)
+# Raises a ValueError with the message for the user if the user or the channel have run the operation too often
+def check_rate_limits(operation, user_id, channel_id, env):
+    for scope, bucket_id in (('user', user_id), ('channel', channel_id)):
+        if scope not in operation.rate_limit:
+            continue
 
-    args = [arg for arg in tokens if not arg.startswith('--')]
-    operation = args.pop(0) if args else None
+        capacity, refill_seconds = operation.rate_limit[scope]
 
-    # Build key-value pairs with the options
-    options = [arg for arg in tokens if arg.startswith('--')]
-    options = {
-        op if '=' not in op else op.split('=')[0]: '' if '=' not in op else op.split('=')[1]
-        for op in options
-    }
+        try:
+            wait_seconds = rate_limits_manager.consume(
+                f'{operation.name}|{scope}|{bucket_id}', capacity, refill_seconds, env
+            )
+        except get_client('dynamodb').exceptions.ClientError as e:
+            # The limits only protect the application, so requests are let through when they can't be checked
+            print(f'Unable to check the {scope} rate limit: {e}')
+            record_metric(METRIC_RATE_LIMITER_ERRORS, 1, UNIT_COUNT, Scope=scope)
+            continue
 
-    return operation, args, options
+        if wait_seconds > 0:
+            record_metric(METRIC_RATE_LIMITED_REQUESTS, 1, UNIT_COUNT, Scope=scope)
+            raise ValueError(__RATE_LIMIT_ERROR_MESSAGES[scope].format(operation.name, math.ceil(wait_seconds)))
 
 
 def validate_command(func):
-    def inner_function(*args, **kwargs):
-        manager = SlackManager(body=args[0]['body'])
-
+    @slack_request_handler
+    def inner_function(event, context, request):
         try:
-            operation, op_args, options = parse_slash_command(manager.text)
-            __set_env(options)
+            operation_name, op_args, options = request.command
+            env = request.env
+            operation = get_operation(env, operation_name)
 
-            if operation is None or operation not in OP_DEFINITION[__ENV.value]:
+            if operation is None:
                 raise ValueError(__INPUT_ERROR_MESSAGE)
 
-            if (OP_DEFINITION[__ENV.value][operation]['allowedUsers'][0] != '*' and
-                    manager.username not in OP_DEFINITION[__ENV.value][operation]['allowedUsers']):
+            if not is_user_allowed(operation, request.form['user_name']):
                 raise ValueError(__PERMISSIONS_ERROR_MESSAGE)
 
             __validate_operation_args(operation, op_args, options)
+
+            # Only requests received from Slack count, not the ones handed over by other functions
+            if request.verified:
+                check_rate_limits(operation, request.form['user_id'], request.form['channel_id'], env)
         except ValueError as e:
             return {
                 'statusCode': 200,
@@ -97,18 +101,16 @@ def validate_command(func):
                 })
             }
 
-        return func(*args, **kwargs)
+        return func(event, context, request)
 
     return inner_function
 
 
 def verify_slack_request(func):
-    def inner_function(*args, **kwargs):
-        headers = args[0]['headers']
-        body = args[0]['body']
-
-        request_timestamp = headers.get('X-Slack-Request-Timestamp', headers.get('x-slack-request-timestamp'))
-        slack_signature = headers.get('X-Slack-Signature', headers.get('x-slack-signature'))
+    @slack_request_handler
+    def inner_function(event, context, request):
+        request_timestamp = request.get_header('X-Slack-Request-Timestamp')
+        slack_signature = request.get_header('X-Slack-Signature')
 
         try:
             if not request_timestamp or not slack_signature:
@@ -119,10 +121,10 @@ def verify_slack_request(func):
             if abs(time.time() - int(request_timestamp)) > 60 * 5:
                 raise ValueError()
 
-            sig_basestring = f"v0:{request_timestamp}:{body}".encode('utf-8')
+            sig_basestring = f"v0:{request_timestamp}:{request.body}".encode('utf-8')
 
             my_signature = 'v0=' + hmac.new(
-                __SIGNING_SECRET.encode('utf-8'),
+                get_secret_value(SECRET_SLACK_SIGNING_SECRET).encode('utf-8'),
                 sig_basestring,
                 hashlib.sha256
             ).hexdigest()
@@ -130,11 +132,49 @@ def verify_slack_request(func):
             if not hmac.compare_digest(my_signature, slack_signature):
                 raise ValueError()
 
-            return func(*args, **kwargs)
+            request.verified = True
         except ValueError:
             return {
                 'statusCode': 401,
                 'body': 'Invalid Slack signature.'
             }
 
+        return func(event, context, request)
+
+    return inner_function
+
+
+def __get_idempotency_key(request):
+    # Events carry their id in a JSON body, and slash commands and interactions a trigger id in a form
+    if request.body.lstrip().startswith('{'):
+        event_id = json.loads(request.body).get('event_id')
+        return f'event:{event_id}' if event_id else None
+
+    trigger_id = request.form.get('trigger_id') or request.form.get('payload', {}).get('trigger_id')
+
+    return f'trigger:{trigger_id}' if trigger_id else None
+
+
+def deduplicate_slack_request(func):
+    # Must be applied after verify_slack_request, so that unsigned requests can't claim the keys of genuine ones
+    @slack_request_handler
+    def inner_function(event, context, request):
+        key = __get_idempotency_key(request)
+
+        if key is None:
+            return func(event, context, request)
+
+        # Slack redelivers events that are not acknowledged within 3 seconds, flagging them with this header
+        retry_num = request.get_header('X-Slack-Retry-Num')
+
+        if not idempotency_manager.claim(key):
+            record_metric(METRIC_DUPLICATE_REQUESTS, 1, UNIT_COUNT, Source='SlackRetry' if retry_num else 'Redelivery')
+            return {'statusCode': 200}
+
+        try:
+            return func(event, context, request)
+        except Exception:
+            idempotency_manager.release(key)
+            raise
+
     return inner_function
@@ -0,0 +1,34 @@
+import os
+import random
+
+from .aws_utils import get_client
+from .metrics_utils import reset_cold_start
+
+
+# Primes the AWS clients of the given services, and the Slack client if the function uses it, before SnapStart takes
+# the snapshot of the initialised function, and cleans up the state that must not be shared by restored environments
+def register_snapshot_hooks(services=(), slack=False):
+    if os.environ.get('SNAP_START') != 'true':
+        return
+
+    # Only provided by the Lambda runtime
+    from snapshot_restore_py import register_after_restore, register_before_snapshot
+
+    @register_before_snapshot
+    def before_snapshot():
+        for service in services:
+            get_client(service)
+
+        if slack:
+            from ..entity_managers.slack_manager import SlackManager
+            SlackManager.prime()
+
+    @register_after_restore
+    def after_restore():
+        # Every restored environment would otherwise generate the same random numbers
+        random.seed()
+        reset_cold_start()
+
+        if slack:
+            from ..entity_managers.slack_manager import SlackManager
+            SlackManager.reset_connections()
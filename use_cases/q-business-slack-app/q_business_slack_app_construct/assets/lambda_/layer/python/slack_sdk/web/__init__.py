@@ -1,9 +1,11 @@
 """The Slack Web API allows you to build applications that interact with Slack
 in more complex ways than the integrations we provide out of the box."""
 from .client import WebClient
+from .connection_pool import HTTPConnectionPool
 from .slack_response import SlackResponse
 
 __all__ = [
     "WebClient",
+    "HTTPConnectionPool",
     "SlackResponse",
 ]
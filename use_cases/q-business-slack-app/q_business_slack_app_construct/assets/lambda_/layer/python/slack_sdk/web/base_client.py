@@ -20,6 +20,7 @@ from urllib.request import Request, urlopen, OpenerDirector, ProxyHandler, HTTPS
 
 from slack_sdk.errors import SlackRequestError
 from .deprecation import show_deprecation_warning_if_any
+from .connection_pool import HTTPConnectionPool
 from .file_upload_v2_result import FileUploadV2Result
 from .internal_utils import (
     convert_bool_to_0_or_1,
@@ -55,6 +56,7 @@ class BaseClient:
         team_id: Optional[str] = None,
         logger: Optional[logging.Logger] = None,
         retry_handlers: Optional[List[RetryHandler]] = None,
+        connection_pool: Optional[HTTPConnectionPool] = None,
     ):
         self.token = None if token is None else token.strip()
         """A string specifying an `xoxp-*` or `xoxb-*` token."""
@@ -87,6 +89,10 @@ class BaseClient:
 
         self.retry_handlers = retry_handlers if retry_handlers is not None else default_retry_handlers()
 
+        self.connection_pool = connection_pool
+        """An optional `HTTPConnectionPool` used to keep connections alive across requests.
+        If it is not specified, every request opens a new connection with urllib."""
+
         if self.proxy is None or len(self.proxy.strip()) == 0:
             env_variable = load_http_proxy_from_env(self._logger)
             if env_variable is not None:
@@ -524,6 +530,9 @@ class BaseClient:
         # which might be a security risk if the URL to open can be manipulated by an external user.
         # (BAN-B310)
         if url.lower().startswith("http"):
+            if self.connection_pool is not None:
+                return self._perform_pooled_http_request_internal(url, req)
+
             opener: Optional[OpenerDirector] = None
             if self.proxy is not None:
                 if isinstance(self.proxy, str):
@@ -562,6 +571,49 @@ class BaseClient:
             return {"status": resp.code, "headers": resp.headers, "body": decoded_body}
         raise SlackRequestError(f"Invalid URL detected: {url}")
 
+    def _perform_pooled_http_request_internal(
+        self,
+        url: str,
+        req: Request,
+    ) -> Dict[str, Any]:
+        if self.proxy is not None and not isinstance(self.proxy, str):
+            raise SlackRequestError(f"Invalid proxy detected: {self.proxy} must be a str value")
+
+        resp, data = self.connection_pool.request(  # type: ignore[union-attr]
+            method=req.get_method(),
+            url=url,
+            body=req.data,  # type: ignore[arg-type]
+            headers=dict(req.header_items()),
+            timeout=self.timeout,
+            ssl=self.ssl,
+            proxy=self.proxy,
+        )
+        if not 200 <= resp.status < 300:
+            # Behave like urllib so that the retry handlers and error handling stay the same
+            raise HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(data))
+
+        if resp.headers.get_content_type() == "application/gzip":
+            # admin.analytics.getFile
+            if self._logger.level <= logging.DEBUG:
+                self._logger.debug(
+                    "Received the following response - "
+                    f"status: {resp.status}, "
+                    f"headers: {dict(resp.headers)}, "
+                    f"body: (binary)"
+                )
+            return {"status": resp.status, "headers": resp.headers, "body": data}
+
+        charset = resp.headers.get_content_charset() or "utf-8"
+        decoded_body: str = data.decode(charset)
+        if self._logger.level <= logging.DEBUG:
+            self._logger.debug(
+                "Received the following response - "
+                f"status: {resp.status}, "
+                f"headers: {dict(resp.headers)}, "
+                f"body: {decoded_body}"
+            )
+        return {"status": resp.status, "headers": resp.headers, "body": decoded_body}
+
     def _build_urllib_request_headers(
         self, token: str, has_json: bool, has_files: bool, additional_headers: dict
     ) -> Dict[str, str]:
@@ -0,0 +1,210 @@
+"""A keep-alive HTTP connection pool for the synchronous Web API client.
+
+`urllib.request.urlopen` opens a new connection for every request, so each API call
+pays for DNS resolution, the TCP handshake and the TLS handshake. Passing an
+`HTTPConnectionPool` to `WebClient` reuses the connections instead.
+"""
+
+import http.client
+import select
+import threading
+import time
+from base64 import b64encode
+from collections import deque
+from ssl import SSLContext
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from slack_sdk.errors import SlackRequestError
+
+# Errors raised when the server closed an idle connection that was taken from the pool
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+# Methods that can be sent again when a pooled connection fails after the request was sent, since the server may
+# already have processed it. Web API methods are all called with POST, so they are never sent twice
+_IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"))
+
+
+class HTTPConnectionPool:
+    """Keeps idle `http.client` connections per host so that they can be reused by later requests.
+
+    A single pool can be shared by several clients and threads.
+
+    Args:
+        max_connections_per_host: The maximum number of idle connections kept for each host.
+            Connections released beyond this limit are closed. Default is 4.
+        idle_timeout: The number of seconds after which an idle connection is closed
+            instead of being reused. Default is 30 seconds.
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = 4,
+        idle_timeout: float = 30,
+    ):
+        if max_connections_per_host < 1:
+            raise ValueError("max_connections_per_host must be greater than 0")
+        self.max_connections_per_host = max_connections_per_host
+        self.idle_timeout = idle_timeout
+        self._idle: Dict[tuple, Deque[Tuple[http.client.HTTPConnection, float]]] = {}
+        self._lock = threading.Lock()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        ssl: Optional[SSLContext] = None,
+        proxy: Optional[str] = None,
+    ) -> Tuple[http.client.HTTPResponse, bytes]:
+        """Sends a request and reads the whole response body.
+
+        Returns the response, whose headers are an `http.client.HTTPMessage` as with urllib,
+        and its body. The connection goes back to the pool unless the server asked to close it.
+
+        Idle connections that the server has closed are discarded before being used. If a pooled
+        connection still fails, the request is only sent again on a new connection when it failed
+        before it was sent, or when its method is idempotent.
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise SlackRequestError(f"Invalid URL detected: {url}")
+        if proxy is not None and not isinstance(proxy, str):
+            raise SlackRequestError(f"Invalid proxy detected: {proxy} must be a str value")
+
+        # Connections are only shared by requests that would have opened identical ones
+        key = (parsed.scheme, parsed.hostname, parsed.port, proxy, id(ssl), timeout)
+        headers = dict(headers or {})
+        target = parsed.path or "/"
+        if parsed.query:
+            target += "?" + parsed.query
+        if proxy is not None and parsed.scheme == "http":
+            # Plain HTTP proxies expect the absolute URL and their credentials on every request
+            target = url
+            headers.update(self._proxy_headers(proxy))
+
+        conn = self._acquire(key)
+        reused = conn is not None
+        while True:
+            if conn is None:
+                conn = self._connect(parsed, timeout, ssl, proxy)
+            sent = False
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                sent = True
+                response = conn.getresponse()
+                data = response.read()
+            except _STALE_CONNECTION_ERRORS:
+                conn.close()
+                # Once sent, the request may have been processed before the connection was dropped, and sending
+                # it again would for instance post a message twice
+                if not reused or (sent and method.upper() not in _IDEMPOTENT_METHODS):
+                    raise
+                conn, reused = None, False
+                continue
+            except BaseException:
+                conn.close()
+                raise
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            return response, data
+
+    def close(self) -> None:
+        """Closes all the idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn, _ in connections:
+                conn.close()
+
+    def _acquire(self, key: tuple) -> Optional[http.client.HTTPConnection]:
+        while True:
+            conn = self._take_idle(key)
+            if conn is None or not self._is_dropped(conn):
+                return conn
+            conn.close()
+
+    def _take_idle(self, key: tuple) -> Optional[http.client.HTTPConnection]:
+        expired = []
+        conn = None
+        now = time.monotonic()
+        with self._lock:
+            connections = self._idle.get(key)
+            while connections:
+                # The most recently used connection is the least likely to have been closed by the server
+                candidate, released_at = connections.pop()
+                if now - released_at < self.idle_timeout:
+                    conn = candidate
+                    break
+                expired.append(candidate)
+            # Anything older than the connection just discarded has expired too
+            while connections and now - connections[0][1] >= self.idle_timeout:
+                expired.append(connections.popleft()[0])
+        for candidate in expired:
+            candidate.close()
+        return conn
+
+    @staticmethod
+    def _is_dropped(conn: http.client.HTTPConnection) -> bool:
+        # An idle connection has nothing to read, unless the server closed it or sent something unexpected
+        sock = conn.sock
+        if sock is None:
+            return True
+        try:
+            if hasattr(select, "poll"):
+                poller = select.poll()
+                poller.register(sock, select.POLLIN)
+                return bool(poller.poll(0))
+            readable, _, _ = select.select([sock], [], [], 0)
+            return bool(readable)
+        except (OSError, ValueError):
+            return True
+
+    def _release(self, key: tuple, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            connections = self._idle.setdefault(key, deque())
+            if len(connections) < self.max_connections_per_host:
+                connections.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def _connect(
+        self,
+        parsed,
+        timeout: Optional[float],
+        ssl: Optional[SSLContext],
+        proxy: Optional[str],
+    ) -> http.client.HTTPConnection:
+        host, port = parsed.hostname, parsed.port
+        if proxy is None:
+            if parsed.scheme == "https":
+                return http.client.HTTPSConnection(host, port, timeout=timeout, context=ssl)
+            return http.client.HTTPConnection(host, port, timeout=timeout)
+
+        # As with urllib, the proxy itself is reached over plain HTTP
+        proxy_url = urlparse(proxy if "://" in proxy else f"http://{proxy}")
+        if parsed.scheme == "https":
+            # Tunnel the TLS connection to the target host through the proxy with CONNECT
+            conn = http.client.HTTPSConnection(proxy_url.hostname, proxy_url.port, timeout=timeout, context=ssl)
+            conn.set_tunnel(host, port, headers=self._proxy_headers(proxy))
+            return conn
+        return http.client.HTTPConnection(proxy_url.hostname, proxy_url.port, timeout=timeout)
+
+    @staticmethod
+    def _proxy_headers(proxy: str) -> Dict[str, str]:
+        proxy_url = urlparse(proxy if "://" in proxy else f"http://{proxy}")
+        if proxy_url.username is None:
+            return {}
+        credentials = f"{unquote(proxy_url.username)}:{unquote(proxy_url.password or '')}"
+        return {"Proxy-Authorization": "Basic " + b64encode(credentials.encode("utf-8")).decode("ascii")}
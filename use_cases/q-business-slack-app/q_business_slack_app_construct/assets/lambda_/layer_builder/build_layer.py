@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+import argparse
+import compileall
+import os
+import py_compile
+import shutil
+import sys
+
+from modulefinder import ModuleFinder
+
+
+# Packages that are always shipped whole, as they import their own modules lazily and carry data files
+__WHOLE_PACKAGES = ['app_layer']
+
+__IGNORED_NAMES = shutil.ignore_patterns('__pycache__', '*.pyc')
+
+
+def __get_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def __find_layer_files(layer_path, entry_points):
+    finder = ModuleFinder(path=[layer_path] + sys.path)
+
+    # Each function imports the layer from its own folder, with its own libs_finder module
+    for entry_point in entry_points:
+        finder.path.insert(1, os.path.dirname(os.path.abspath(entry_point)))
+        finder.run_script(entry_point)
+        finder.modules.pop('libs_finder', None)
+        del finder.path[1]
+
+    # Follow the imports of every module of these packages, since their lazy imports can't be found by analysing the code
+    for package in __WHOLE_PACKAGES:
+        for root, _, files in os.walk(os.path.join(layer_path, package)):
+            for f in files:
+                if f.endswith('.py'):
+                    module = os.path.splitext(os.path.relpath(os.path.join(root, f), layer_path))[0]
+                    finder.import_hook(module.replace(os.sep, '.').removesuffix('.__init__'))
+
+    layer_path = os.path.abspath(layer_path)
+    layer_files = set()
+
+    for module in finder.modules.values():
+        path = os.path.abspath(module.__file__) if module.__file__ else None
+
+        if path is None or not path.startswith(layer_path + os.sep):
+            continue
+
+        layer_files.add(os.path.relpath(path, layer_path))
+
+    return layer_files
+
+
+def __copy_layer(layer_path, output_path, layer_files):
+    for package in __WHOLE_PACKAGES:
+        shutil.copytree(os.path.join(layer_path, package), os.path.join(output_path, package), ignore=__IGNORED_NAMES)
+
+    for layer_file in layer_files:
+        if layer_file.split(os.sep)[0] in __WHOLE_PACKAGES:
+            continue
+
+        # Packages need their __init__ modules, which ModuleFinder always reports as used
+        os.makedirs(os.path.join(output_path, os.path.dirname(layer_file)), exist_ok=True)
+        shutil.copy2(os.path.join(layer_path, layer_file), os.path.join(output_path, layer_file))
+
+
+def __precompile(output_path):
+    # Lambda extracts the layer with arbitrary timestamps, so the bytecode must not be validated against them
+    return compileall.compile_dir(
+        output_path,
+        quiet=1,
+        invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Build a layer with only the modules imported by the given entry points, precompiled to bytecode'
+    )
+    parser.add_argument('entry_points', nargs='+', help='Modules with the handlers of the functions that use the layer')
+    parser.add_argument('--layer', required=True, help='Folder with the packages of the layer')
+    parser.add_argument('--output', required=True, help='Folder where the trimmed layer is written')
+
+    args = parser.parse_args()
+
+    layer_files = __find_layer_files(args.layer, args.entry_points)
+    os.makedirs(args.output, exist_ok=True)
+    __copy_layer(args.layer, args.output, layer_files)
+
+    if not __precompile(args.output):
+        sys.exit('Unable to compile the layer')
+
+    removed = sorted(
+        name for name in os.listdir(args.layer)
+        if name != '__pycache__' and not os.path.exists(os.path.join(args.output, name))
+    )
+    modules = [f for root, _, files in os.walk(args.layer) for f in files if f.endswith('.py')]
+    kept_modules = [f for root, _, files in os.walk(args.output) for f in files if f.endswith('.py')]
+
+    print(f'Layer size: {__get_size(args.layer) / 2 ** 20:.2f} MiB -> {__get_size(args.output) / 2 ** 20:.2f} MiB '
+          f'(including bytecode for Python {sys.version_info.major}.{sys.version_info.minor})')
+    print(f'Kept {len(kept_modules)} of {len(modules)} modules. Removed packages: {", ".join(removed) or "none"}')
+
+
+if __name__ == '__main__':
+    main()
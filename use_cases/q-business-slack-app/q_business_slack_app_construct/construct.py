@@ -1,6 +1,6 @@
 from aws_cdk import (
     aws_secretsmanager as secretsmanager,
-    CfnParameter
+    CfnParameter, Duration
 )
 from constructs import Construct
 from .stacks import *
@@ -44,7 +44,11 @@ class QBusinessSlackApp(Construct):
             secret_string=secret_value_param.value_as_string
         )
 
-    def __init__(self, scope: Construct, construct_id: str) -> None:
+    def __init__(self, scope: Construct, construct_id: str, answers_cache_ttl=Duration.days(1),
+                 answers_cache_sync_check_interval=Duration.minutes(5), consolidated_dispatcher=False,
+                 ask_queue=False, ask_queue_batch_size=10, ask_queue_max_concurrency=2,
+                 ask_queue_max_parallel_questions=10, trim_layer=False, function_settings=None,
+                 async_slack_events=False, conversation_threads_ttl=None) -> None:
         super().__init__(scope, construct_id)
 
         app_name = self.__create_app_name_parameter(scope)
@@ -54,5 +58,18 @@ class QBusinessSlackApp(Construct):
         qbusiness_stack = QBusinessStack(scope, "QBusinessStack", app_name.value_as_string)
         s3_stack = S3Stack(scope, "S3Stack", app_name.value_as_string)
         ddb_stack = DdbStack(scope, "DynamoDBStack", app_name.value_as_string)
-        lambda_stack = LambdaStack(scope, "LambdaStack", app_name.value_as_string, ddb_stack, qbusiness_stack, s3_stack)
+        lambda_stack = LambdaStack(
+            scope, "LambdaStack", app_name.value_as_string, ddb_stack, qbusiness_stack, s3_stack,
+            answers_cache_ttl=answers_cache_ttl,
+            answers_cache_sync_check_interval=answers_cache_sync_check_interval,
+            consolidated_dispatcher=consolidated_dispatcher,
+            ask_queue=ask_queue,
+            ask_queue_batch_size=ask_queue_batch_size,
+            ask_queue_max_concurrency=ask_queue_max_concurrency,
+            ask_queue_max_parallel_questions=ask_queue_max_parallel_questions,
+            trim_layer=trim_layer,
+            function_settings=function_settings,
+            async_slack_events=async_slack_events,
+            conversation_threads_ttl=conversation_threads_ttl
+        )
         ApiGatewayStack(scope, "ApiGatewayStack", app_name.value_as_string, lambda_stack)
@@ -0,0 +1,48 @@
+from .constants import *
+
+
+FUNC_HANDLE_SLACK_EVENT = 'handle_slack_event'
+FUNC_ONBOARDING = 'onboarding'
+FUNC_HANDLE_SLASH_COMMAND = 'handle_slash_command'
+FUNC_DISPATCHER = 'dispatcher'
+FUNC_ASK = 'ask'
+FUNC_CHAT_SYNC = 'chat_sync'
+FUNC_HELP = 'help'
+FUNC_INVALIDATE_ANSWERS = 'invalidate_answers'
+
+FUNCS = [
+    FUNC_HANDLE_SLACK_EVENT, FUNC_ONBOARDING, FUNC_HANDLE_SLASH_COMMAND, FUNC_DISPATCHER, FUNC_ASK, FUNC_CHAT_SYNC,
+    FUNC_HELP, FUNC_INVALIDATE_ANSWERS
+]
+
+
+class FunctionSettings:
+    # provisioned_concurrency and max_provisioned_concurrency map each environment to a number of execution
+    # environments. Provisioned concurrency is scaled between both numbers to keep its utilization at the target
+    def __init__(self, memory_size=None, snap_start=False, provisioned_concurrency=None,
+                 max_provisioned_concurrency=None, utilization_target=0.7):
+        self.memory_size = memory_size
+        self.snap_start = snap_start
+        self.provisioned_concurrency = provisioned_concurrency or {}
+        self.max_provisioned_concurrency = max_provisioned_concurrency or {}
+        self.utilization_target = utilization_target
+
+    def validate(self, func_name):
+        envs = set(self.provisioned_concurrency) | set(self.max_provisioned_concurrency)
+
+        if not envs.issubset(ENVS):
+            raise ValueError(f'Unknown environments {sorted(envs - set(ENVS))} in the settings of {func_name}')
+
+        # The dev alias points to $LATEST, which can't have provisioned concurrency
+        if ENV_DEV in envs:
+            raise ValueError(f'Provisioned concurrency can only be configured for the {ENV_PROD} alias of {func_name}')
+
+        if self.snap_start and envs:
+            raise ValueError(f'SnapStart and provisioned concurrency can not be combined in {func_name}')
+
+        for env, max_capacity in self.max_provisioned_concurrency.items():
+            if max_capacity < self.provisioned_concurrency.get(env, 1):
+                raise ValueError(f'The maximum provisioned concurrency of {func_name} is lower than the minimum')
+
+        if not 0 < self.utilization_target <= 1:
+            raise ValueError(f'The utilization target of {func_name} must be greater than 0 and at most 1')
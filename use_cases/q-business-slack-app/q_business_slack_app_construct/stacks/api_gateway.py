@@ -46,6 +46,14 @@ class ApiGatewayStack(NestedStack):
             )
         )
 
+    @staticmethod
+    def __get_invocation_type_parameters(lambda_stack):
+        # The consolidated dispatcher is invoked asynchronously, so Slack is acknowledged without waiting for it
+        if not lambda_stack.consolidated_dispatcher:
+            return None
+
+        return {'integration.request.header.X-Amz-Invocation-Type': "'Event'"}
+
     def __create_handle_slash_command_integration(self, lambda_stack):
         func_arn = lambda_stack.func_handle_slash_command.function_arn + ":${stageVariables.env}"
 
@@ -58,6 +66,7 @@ class ApiGatewayStack(NestedStack):
                     function_arn=func_arn,
                 ),
                 proxy=False,
+                request_parameters=self.__get_invocation_type_parameters(lambda_stack),
                 passthrough_behavior=apigateway.PassthroughBehavior.WHEN_NO_TEMPLATES,
                 request_templates={
                     'application/x-www-form-urlencoded': '''
@@ -24,7 +24,96 @@ class DdbStack(NestedStack):
             for env in ENVS
         }
 
+    @staticmethod
+    def __add_user_id_index(users_table):
+        # Lets returning users be identified by their Slack id, before their profile is retrieved
+        for table in users_table.values():
+            table.add_global_secondary_index(
+                index_name='UserIdIndex',
+                partition_key=ddb.Attribute(
+                    type=ddb.AttributeType.STRING,
+                    name='user_id'
+                ),
+                projection_type=ddb.ProjectionType.KEYS_ONLY
+            )
+
+    def __create_answers_table(self, app_name):
+        return {
+            env: ddb.Table(
+                self, f'AnswersTable{env}',
+                table_name=f'{app_name}-AnswersTable_{env}',
+                removal_policy=RemovalPolicy.DESTROY,
+                billing_mode=ddb.BillingMode.PAY_PER_REQUEST,
+                time_to_live_attribute='expires_at',
+                partition_key=ddb.Attribute(
+                    type=ddb.AttributeType.STRING,
+                    name='cache_key'
+                )
+            )
+
+            for env in ENVS
+        }
+
+    def __create_idempotency_table(self, app_name):
+        # Ids of the events and commands that have already been processed, to ignore the requests redelivered by Slack
+        return {
+            env: ddb.Table(
+                self, f'IdempotencyTable{env}',
+                table_name=f'{app_name}-IdempotencyTable_{env}',
+                removal_policy=RemovalPolicy.DESTROY,
+                billing_mode=ddb.BillingMode.PAY_PER_REQUEST,
+                time_to_live_attribute='expires_at',
+                partition_key=ddb.Attribute(
+                    type=ddb.AttributeType.STRING,
+                    name='idempotency_key'
+                )
+            )
+
+            for env in ENVS
+        }
+
+    def __create_rate_limits_table(self, app_name):
+        # Token buckets that limit how often users and channels can run each operation
+        return {
+            env: ddb.Table(
+                self, f'RateLimitsTable{env}',
+                table_name=f'{app_name}-RateLimitsTable_{env}',
+                removal_policy=RemovalPolicy.DESTROY,
+                billing_mode=ddb.BillingMode.PAY_PER_REQUEST,
+                time_to_live_attribute='expires_at',
+                partition_key=ddb.Attribute(
+                    type=ddb.AttributeType.STRING,
+                    name='bucket_key'
+                )
+            )
+
+            for env in ENVS
+        }
+
+    def __create_threads_table(self, app_name):
+        # Q Business conversation of each Slack thread started by an answer, so that replies can continue it
+        return {
+            env: ddb.Table(
+                self, f'ThreadsTable{env}',
+                table_name=f'{app_name}-ThreadsTable_{env}',
+                removal_policy=RemovalPolicy.DESTROY,
+                billing_mode=ddb.BillingMode.PAY_PER_REQUEST,
+                time_to_live_attribute='expires_at',
+                partition_key=ddb.Attribute(
+                    type=ddb.AttributeType.STRING,
+                    name='thread_key'
+                )
+            )
+
+            for env in ENVS
+        }
+
     def __init__(self, scope: Construct, construct_id: str, app_name) -> None:
         super().__init__(scope, construct_id)
 
         self.users_table = self.__create_users_table(app_name)
+        self.__add_user_id_index(self.users_table)
+        self.answers_table = self.__create_answers_table(app_name)
+        self.idempotency_table = self.__create_idempotency_table(app_name)
+        self.rate_limits_table = self.__create_rate_limits_table(app_name)
+        self.threads_table = self.__create_threads_table(app_name)
@@ -1,10 +1,18 @@
+from urllib.parse import urlparse
+
 from aws_cdk import (
     aws_lambda as _lambda,
     aws_iam as iam,
-    NestedStack, Duration, RemovalPolicy,
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_lambda_event_sources as event_sources,
+    aws_sqs as sqs,
+    BundlingOptions, NestedStack, Duration, RemovalPolicy,
 )
 from constructs import Construct
 from ..constants import *
+from ..function_settings import *
+from ..assets.lambda_.layer.python.app_layer.utils.slack_operations_definition import OP_DEFINITION
 
 
 class LambdaStack(NestedStack):
@@ -17,23 +25,132 @@ class LambdaStack(NestedStack):
         func.add_to_role_policy(
             iam.PolicyStatement(
                 effect=iam.Effect.ALLOW,
-                actions=['secretsmanager:GetSecretValue'],
+                actions=['secretsmanager:GetSecretValue', 'secretsmanager:BatchGetSecretValue'],
                 resources=['*'],
             )
         )
 
-    def __create_layer(self, app_name):
+    def __add_answers_cache(self, func, aliases, q_app, read_only):
+        if self.__answers_cache_ttl is None:
+            return
+
+        func.add_environment('APP_ID', q_app.attr_application_id)
+        func.add_environment('ANSWERS_TTL_SECONDS', str(int(self.__answers_cache_ttl.to_seconds())))
+
+        for env in ENVS:
+            func.add_environment(f'TABLE_ANSWERS_{env}', self.__answers_table[env].table_name)
+
+            if read_only:
+                self.__answers_table[env].grant_read_data(aliases[env])
+            else:
+                self.__answers_table[env].grant_read_write_data(aliases[env])
+
+    def __add_idempotency_store(self, func, aliases):
+        for env in ENVS:
+            func.add_environment(f'TABLE_IDEMPOTENCY_{env}', self.__idempotency_table[env].table_name)
+            self.__idempotency_table[env].grant_read_write_data(aliases[env])
+
+    def __add_rate_limits(self, func):
+        # Commands are validated, and rate limited, against the Slack environment set by the user, whatever the alias
+        for env in ENVS:
+            func.add_environment(f'TABLE_RATE_LIMITS_{env}', self.__rate_limits_table[env].table_name)
+            self.__rate_limits_table[env].grant_read_write_data(func)
+
+    def __add_allow_list_permissions(self, func):
+        # Allow-lists that the operation definitions of the layer load from S3 or DynamoDB
+        sources = {
+            definition['allowedUsersSource']
+            for operations in OP_DEFINITION.values() for definition in operations.values()
+            if 'allowedUsersSource' in definition
+        }
+
+        for source in sorted(sources):
+            url = urlparse(source)
+
+            if url.scheme == 's3':
+                actions = ['s3:GetObject']
+                resource = f'arn:{self.partition}:s3:::{url.netloc}{url.path}'
+            else:
+                actions = ['dynamodb:GetItem']
+                resource = f'arn:{self.partition}:dynamodb:{self.region}:{self.account}:table/{url.netloc}'
+
+            func.add_to_role_policy(
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=actions,
+                    resources=[resource],
+                )
+            )
+
+    def __add_conversation_threads(self, func_handle_slack_event, func_chat):
+        if self.__conversation_threads_ttl is None:
+            return
+
+        for func in [func_handle_slack_event, func_chat]:
+            func.add_environment('THREADS_TTL_SECONDS', str(int(self.__conversation_threads_ttl.to_seconds())))
+
+            for env in ENVS:
+                func.add_environment(f'TABLE_THREADS_{env}', self.__threads_table[env].table_name)
+
+        for env in ENVS:
+            self.__threads_table[env].grant_read_data(func_handle_slack_event)
+            self.__threads_table[env].grant_read_write_data(func_chat)
+
+        # Replies in the thread of an answer are posted by handleSlackEvent, which validates them as ask commands, and
+        # answered by the function that queries the model
+        func_handle_slack_event.add_environment('FUNC_CHAT_SYNC', func_chat.function_name)
+        func_chat.grant_invoke(func_handle_slack_event)
+        self.__add_rate_limits(func_handle_slack_event)
+        self.__add_allow_list_permissions(func_handle_slack_event)
+
+    def __create_layer_code(self, trim_layer):
+        if not trim_layer:
+            return _lambda.Code.from_asset(f'{self.__ASSETS_PATH}/layer')
+
+        # Keep only the modules imported by the functions, precompiled by the Python version of the runtime
+        return _lambda.Code.from_asset(
+            self.__ASSETS_PATH,
+            exclude=['**/__pycache__'],
+            bundling=BundlingOptions(
+                image=self.__RUNTIME.bundling_image,
+                command=[
+                    'bash', '-c',
+                    'python layer_builder/build_layer.py --layer layer/python --output /asset-output/python '
+                    'func_*/index.py'
+                ]
+            )
+        )
+
+    def __create_layer(self, app_name, trim_layer):
         return _lambda.LayerVersion(
             self, 'Layer',
             layer_version_name=app_name,
             compatible_runtimes=[self.__RUNTIME],
             compatible_architectures=[self.__ARCH],
-            code=_lambda.Code.from_asset(f'{self.__ASSETS_PATH}/layer'),
+            code=self.__create_layer_code(trim_layer),
             removal_policy=RemovalPolicy.DESTROY
         )
 
-    def __create_aliases(self, func: _lambda.Function) -> dict:
-        return {
+    def __get_function_props(self, func_name) -> dict:
+        settings = self.__function_settings.get(func_name, FunctionSettings())
+        props = {}
+
+        if settings.memory_size is not None:
+            props['memory_size'] = settings.memory_size
+
+        if settings.snap_start:
+            # Only published versions are snapshotted, so the dev alias, which points to $LATEST, is not affected
+            props['snap_start'] = _lambda.SnapStartConf.ON_PUBLISHED_VERSIONS
+
+        return props
+
+    def __create_aliases(self, func: _lambda.Function, func_name) -> dict:
+        settings = self.__function_settings.get(func_name, FunctionSettings())
+
+        if settings.snap_start:
+            func.add_environment('SNAP_START', 'true')
+
+        aliases = {
             ENV_DEV: _lambda.Alias(
                 self,
                 f'{func.node.id}{ENV_DEV}Alias',
@@ -44,13 +161,48 @@ class LambdaStack(NestedStack):
                 self,
                 f'{func.node.id}{ENV_PROD}Alias',
                 alias_name=ENV_PROD,
-                version=func.current_version
+                version=func.current_version,
+                provisioned_concurrent_executions=settings.provisioned_concurrency.get(ENV_PROD)
             )
         }
 
-    def __create_func_handle_slack_event(self, app_name, users_table):
+        for env, max_capacity in settings.max_provisioned_concurrency.items():
+            aliases[env].add_auto_scaling(
+                min_capacity=settings.provisioned_concurrency.get(env, 1),
+                max_capacity=max_capacity
+            ).scale_on_utilization(utilization_target=settings.utilization_target)
+
+        return aliases
+
+    def __create_onboarding_func(self, app_name, users_table):
+        func = _lambda.Function(
+            self, 'FuncOnboarding',
+            **self.__get_function_props(FUNC_ONBOARDING),
+            function_name=f'{app_name}Onboarding',
+            architecture=self.__ARCH,
+            runtime=self.__RUNTIME,
+            handler='index.handler',
+            timeout=Duration.minutes(1),
+            code=_lambda.Code.from_asset(f'{self.__ASSETS_PATH}/func_onboarding'),
+            environment={
+                f'TABLE_USERS_{ENV_DEV}': users_table[ENV_DEV].table_name,
+                f'TABLE_USERS_{ENV_PROD}': users_table[ENV_PROD].table_name
+            },
+            layers=[self.__layer]
+        )
+
+        self.__add_secret_retrieval_permissions(func)
+        aliases = self.__create_aliases(func, FUNC_ONBOARDING)
+
+        for env in users_table:
+            users_table[env].grant_read_write_data(aliases[env])
+
+        return func
+
+    def __create_func_handle_slack_event(self, app_name, users_table, func_onboarding=None):
         func = _lambda.Function(
             self, 'FuncHandleSlackEvent',
+            **self.__get_function_props(FUNC_HANDLE_SLACK_EVENT),
             code=_lambda.Code.from_asset(f'{self.__ASSETS_PATH}/func_handle_slack_event'),
             handler='index.handler',
             timeout=Duration.minutes(1),
@@ -65,17 +217,28 @@ class LambdaStack(NestedStack):
         )
 
         self.__add_secret_retrieval_permissions(func)
-        aliases = self.__create_aliases(func)
+        aliases = self.__create_aliases(func, FUNC_HANDLE_SLACK_EVENT)
+        self.__add_idempotency_store(func, aliases)
 
         for env in users_table:
-            users_table[env].grant_read_write_data(aliases[env])
+            if func_onboarding is None:
+                users_table[env].grant_read_write_data(aliases[env])
+            else:
+                users_table[env].grant_read_data(aliases[env])
+
             aliases[env].grant_invoke(iam.ServicePrincipal('apigateway.amazonaws.com'))
 
+        # Events are acknowledged straight away and new users are onboarded by a separate function
+        if func_onboarding is not None:
+            func.add_environment('FUNC_ONBOARDING', func_onboarding.function_name)
+            func_onboarding.grant_invoke(func)
+
         return func
 
     def __create_func_handle_slash_command(self, app_name, func_ask, func_help):
         func = _lambda.Function(
             self, 'FuncHandleSlashCommand',
+            **self.__get_function_props(FUNC_HANDLE_SLASH_COMMAND),
             code=_lambda.Code.from_asset(f'{self.__ASSETS_PATH}/func_handle_slash_command'),
             handler='index.handler',
             timeout=Duration.seconds(20),
@@ -90,16 +253,82 @@ class LambdaStack(NestedStack):
         )
 
         self.__add_secret_retrieval_permissions(func)
-        aliases = self.__create_aliases(func)
+        aliases = self.__create_aliases(func, FUNC_HANDLE_SLASH_COMMAND)
+        self.__add_idempotency_store(func, aliases)
+        self.__add_rate_limits(func)
+        self.__add_allow_list_permissions(func)
+
+        for env in ENVS:
+            aliases[env].grant_invoke(iam.ServicePrincipal('apigateway.amazonaws.com'))
+
+        return func
+
+    def __create_dispatcher_func(self, app_name, q_app, bucket):
+        function_name = f'{app_name}Dispatcher'
+
+        func = _lambda.Function(
+            self, 'FuncDispatcher',
+            **self.__get_function_props(FUNC_DISPATCHER),
+            function_name=function_name,
+            architecture=self.__ARCH,
+            runtime=self.__RUNTIME,
+            handler='index.handler',
+            timeout=Duration.minutes(1),
+            code=_lambda.Code.from_asset(f'{self.__ASSETS_PATH}/func_dispatcher'),
+            layers=[self.__layer],
+            environment={
+                'APP_ID': q_app.attr_application_id,
+                'BUCKET_NAME': bucket.bucket_name
+            }
+        )
+
+        func.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=['qbusiness:*'],
+                effect=iam.Effect.ALLOW,
+                resources=['*'],
+            )
+        )
+
+        # Commands that target another environment are handed over to the corresponding alias
+        func.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=['lambda:InvokeFunction'],
+                effect=iam.Effect.ALLOW,
+                resources=[f'arn:{self.partition}:lambda:{self.region}:{self.account}:function:{function_name}:*'],
+            )
+        )
+
+        self.__add_secret_retrieval_permissions(func)
+        aliases = self.__create_aliases(func, FUNC_DISPATCHER)
+        self.__add_idempotency_store(func, aliases)
+        self.__add_rate_limits(func)
+        self.__add_allow_list_permissions(func)
+        self.__add_answers_cache(func, aliases, q_app, read_only=False)
 
         for env in ENVS:
             aliases[env].grant_invoke(iam.ServicePrincipal('apigateway.amazonaws.com'))
 
         return func
 
-    def __create_ask_func(self, app_name, func_chat_sync):
+    def __create_ask_queues(self):
+        # The visibility timeout must exceed the timeout of the consuming function, and it is also how long a
+        # throttled question waits before being retried
+        return {
+            env: sqs.Queue(
+                self, f'AskQueue{env}',
+                visibility_timeout=Duration.minutes(2),
+                retention_period=Duration.hours(1),
+                removal_policy=RemovalPolicy.DESTROY
+            )
+
+            for env in ENVS
+        }
+
+    def __create_ask_func(self, app_name, func_chat_sync, q_app):
         func = _lambda.Function(
             self, 'FuncAsk',
+            **self.__get_function_props(FUNC_ASK),
             function_name=f'{app_name}Ask',
             architecture=self.__ARCH,
             runtime=self.__RUNTIME,
@@ -113,16 +342,23 @@ class LambdaStack(NestedStack):
         )
 
         self.__add_secret_retrieval_permissions(func)
-        aliases = self.__create_aliases(func)
+        aliases = self.__create_aliases(func, FUNC_ASK)
+        self.__add_allow_list_permissions(func)
+        self.__add_answers_cache(func, aliases, q_app, read_only=True)
 
         for env in ENVS:
             aliases[env].grant_invoke(iam.ServicePrincipal('apigateway.amazonaws.com'))
 
+            if self.__ask_queues is not None:
+                func.add_environment(f'QUEUE_URL_{env}', self.__ask_queues[env].queue_url)
+                self.__ask_queues[env].grant_send_messages(aliases[env])
+
         return func
 
     def __create_chat_sync_func(self, app_name, q_app, bucket):
         func = _lambda.Function(
             self, 'FuncChatSync',
+            **self.__get_function_props(FUNC_CHAT_SYNC),
             function_name=f'{app_name}ChatSync',
             architecture=self.__ARCH,
             runtime=self.__RUNTIME,
@@ -145,13 +381,67 @@ class LambdaStack(NestedStack):
         )
 
         self.__add_secret_retrieval_permissions(func)
-        self.__create_aliases(func)
+        aliases = self.__create_aliases(func, FUNC_CHAT_SYNC)
+        self.__add_answers_cache(func, aliases, q_app, read_only=False)
+
+        if self.__ask_queues is not None:
+            # Each batch answers up to this number of questions at a time
+            func.add_environment('MAX_WORKERS', str(self.__ask_queue_max_parallel_questions))
+
+            for env in ENVS:
+                aliases[env].add_event_source(
+                    event_sources.SqsEventSource(
+                        self.__ask_queues[env],
+                        batch_size=self.__ask_queue_batch_size,
+                        max_batching_window=Duration.seconds(1),
+                        max_concurrency=self.__ask_queue_max_concurrency,
+                        report_batch_item_failures=True
+                    )
+                )
+
+        return func
+
+    def __create_invalidate_answers_func(self, app_name, q_app, interval):
+        func = _lambda.Function(
+            self, 'FuncInvalidateAnswers',
+            **self.__get_function_props(FUNC_INVALIDATE_ANSWERS),
+            function_name=f'{app_name}InvalidateAnswers',
+            architecture=self.__ARCH,
+            runtime=self.__RUNTIME,
+            handler='index.handler',
+            timeout=Duration.minutes(1),
+            code=_lambda.Code.from_asset(f'{self.__ASSETS_PATH}/func_invalidate_answers'),
+            layers=[self.__layer],
+            environment={
+                'APP_ID': q_app.attr_application_id,
+            }
+        )
+
+        func.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=['qbusiness:ListIndices', 'qbusiness:ListDataSources', 'qbusiness:ListDataSourceSyncJobs'],
+                effect=iam.Effect.ALLOW,
+                resources=['*'],
+            )
+        )
+
+        for env in ENVS:
+            func.add_environment(f'TABLE_ANSWERS_{env}', self.__answers_table[env].table_name)
+            self.__answers_table[env].grant_read_write_data(func)
+
+        # Periodically look for new data source syncs, which make the cached answers stale
+        events.Rule(
+            self, 'InvalidateAnswersRule',
+            schedule=events.Schedule.rate(interval),
+            targets=[targets.LambdaFunction(func)]
+        )
 
         return func
 
     def __create_help_func(self, app_name):
         func = _lambda.Function(
             self, 'FuncHelp',
+            **self.__get_function_props(FUNC_HELP),
             function_name=f'{app_name}DisplayHelp',
             architecture=self.__ARCH,
             runtime=self.__RUNTIME,
@@ -162,21 +452,67 @@ class LambdaStack(NestedStack):
         )
 
         self.__add_secret_retrieval_permissions(func)
-        self.__create_aliases(func)
+        self.__create_aliases(func, FUNC_HELP)
 
         return func
 
-    def __init__(self, scope: Construct, construct_id: str, app_name, ddb_stack, qbusiness_stack, s3_stack) -> None:
+    def __init__(self, scope: Construct, construct_id: str, app_name, ddb_stack, qbusiness_stack, s3_stack,
+                 answers_cache_ttl=Duration.days(1), answers_cache_sync_check_interval=Duration.minutes(5),
+                 consolidated_dispatcher=False, ask_queue=False, ask_queue_batch_size=10, ask_queue_max_concurrency=2,
+                 ask_queue_max_parallel_questions=10, trim_layer=False, function_settings=None,
+                 async_slack_events=False, conversation_threads_ttl=None) -> None:
         super().__init__(scope, construct_id)
 
-        self.__layer = self.__create_layer(app_name)
+        self.__function_settings = function_settings or {}
+
+        for func_name, settings in self.__function_settings.items():
+            if func_name not in FUNCS:
+                raise ValueError(f'Unknown function {func_name}. Valid functions are {FUNCS}')
+
+            settings.validate(func_name)
+
+            # The scheduled function is invoked without aliases, so there are no versions to snapshot or provision
+            if func_name == FUNC_INVALIDATE_ANSWERS and (settings.snap_start or settings.provisioned_concurrency or
+                                                         settings.max_provisioned_concurrency):
+                raise ValueError(f'Only the memory size of {FUNC_INVALIDATE_ANSWERS} can be configured')
+
+        if ask_queue_max_parallel_questions < 1:
+            raise ValueError('ask_queue_max_parallel_questions must be at least 1')
+
+        self.__answers_table = ddb_stack.answers_table
+        self.__idempotency_table = ddb_stack.idempotency_table
+        self.__rate_limits_table = ddb_stack.rate_limits_table
+        self.__threads_table = ddb_stack.threads_table
+        self.__conversation_threads_ttl = conversation_threads_ttl
+        self.__answers_cache_ttl = answers_cache_ttl
+        self.__ask_queue_batch_size = ask_queue_batch_size
+        self.__ask_queue_max_concurrency = ask_queue_max_concurrency
+        self.__ask_queue_max_parallel_questions = ask_queue_max_parallel_questions
+        self.__ask_queues = self.__create_ask_queues() if ask_queue and not consolidated_dispatcher else None
+        self.__layer = self.__create_layer(app_name, trim_layer)
+
+        self.consolidated_dispatcher = consolidated_dispatcher
+        self.func_handle_slack_event = self.__create_func_handle_slack_event(
+            app_name, ddb_stack.users_table,
+            self.__create_onboarding_func(app_name, ddb_stack.users_table) if async_slack_events else None
+        )
+
+        if consolidated_dispatcher:
+            # A single function verifies the command and runs the operation, while API Gateway acknowledges Slack
+            self.func_handle_slash_command = self.__create_dispatcher_func(
+                app_name, qbusiness_stack.app, s3_stack.bucket
+            )
+            self.__add_conversation_threads(self.func_handle_slack_event, self.func_handle_slash_command)
+        else:
+            func_chat_sync = self.__create_chat_sync_func(app_name, qbusiness_stack.app, s3_stack.bucket)
+            func_ask = self.__create_ask_func(app_name, func_chat_sync, qbusiness_stack.app)
+            func_help = self.__create_help_func(app_name)
+            self.func_handle_slash_command = self.__create_func_handle_slash_command(app_name, func_ask, func_help)
 
-        self.func_handle_slack_event = self.__create_func_handle_slack_event(app_name, ddb_stack.users_table)
-        func_chat_sync = self.__create_chat_sync_func(app_name, qbusiness_stack.app, s3_stack.bucket)
-        func_ask = self.__create_ask_func(app_name, func_chat_sync)
-        func_help = self.__create_help_func(app_name)
-        self.func_handle_slash_command = self.__create_func_handle_slash_command(app_name, func_ask, func_help)
+            func_ask.grant_invoke(self.func_handle_slash_command)
+            func_help.grant_invoke(self.func_handle_slash_command)
+            func_chat_sync.grant_invoke(func_ask)
+            self.__add_conversation_threads(self.func_handle_slack_event, func_chat_sync)
 
-        func_ask.grant_invoke(self.func_handle_slash_command)
-        func_help.grant_invoke(self.func_handle_slash_command)
-        func_chat_sync.grant_invoke(func_ask)
+        if answers_cache_ttl is not None:
+            self.__create_invalidate_answers_func(app_name, qbusiness_stack.app, answers_cache_sync_check_interval)
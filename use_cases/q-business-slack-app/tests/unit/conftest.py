@@ -0,0 +1,90 @@
+import importlib.util
+import os
+import sys
+
+from types import SimpleNamespace
+
+import pytest
+
+
+__LAMBDA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'q_business_slack_app_construct', 'assets', 'lambda_'
+)
+__LAYER_PATH = os.path.join(__LAMBDA_PATH, 'layer', 'python')
+
+sys.path.insert(0, __LAYER_PATH)
+
+
+class ClientError(Exception):
+    # Carries a response like the modeled exceptions of botocore
+    def __init__(self, response=None):
+        super().__init__(self.__class__.__name__)
+        self.response = {'Error': {'Code': self.__class__.__name__}, **(response or {})}
+
+
+class ConditionalCheckFailedException(ClientError):
+    pass
+
+
+class ThrottlingException(ClientError):
+    pass
+
+
+class StubClient:
+    # Stand-in of a boto3 client, with only the given operations. Calls are recorded in order
+    def __init__(self, operation_names=(), **operations):
+        self.calls = []
+        self.meta = SimpleNamespace(service_model=SimpleNamespace(operation_names=list(operation_names)))
+        self.exceptions = SimpleNamespace(
+            ClientError=ClientError,
+            ConditionalCheckFailedException=ConditionalCheckFailedException,
+            ThrottlingException=ThrottlingException
+        )
+        self.__operations = operations
+
+    def __getattr__(self, name):
+        operations = self.__dict__['_StubClient__operations']
+
+        if name not in operations:
+            raise AttributeError(name)
+
+        def operation(**kwargs):
+            self.calls.append((name, kwargs))
+            return operations[name](**kwargs)
+
+        return operation
+
+
+@pytest.fixture
+def stub_clients(monkeypatch):
+    # Makes get_client return the given clients in a module, by service name
+    def install(module, **clients):
+        monkeypatch.setattr(module, 'get_client', lambda service: clients[service])
+
+    return install
+
+
+@pytest.fixture
+def load_function(monkeypatch):
+    # Loads the index module of a function as Lambda does, with its own libs_finder module importing the layer. Test
+    # invocations run in the dev environment
+    def load(name):
+        path = os.path.join(__LAMBDA_PATH, name)
+
+        monkeypatch.setenv('AWS_LAMBDA_FUNCTION_NAME', name)
+        monkeypatch.setenv('AWS_LAMBDA_FUNCTION_VERSION', '$LATEST')
+        monkeypatch.syspath_prepend(path)
+
+        sys.modules.pop('libs_finder', None)
+
+        try:
+            spec = importlib.util.spec_from_file_location(name, os.path.join(path, 'index.py'))
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        finally:
+            sys.modules.pop('libs_finder', None)
+
+        return module
+
+    return load
@@ -0,0 +1,69 @@
+import importlib
+
+import pytest
+
+from tests.unit.conftest import StubClient, ThrottlingException
+
+
+chat_sync_module = importlib.import_module('app_layer.operations.chat_sync')
+
+APP_ID = '00000000-0000-0000-0000-000000000000'
+
+
+class StubSlackManager:
+    def __init__(self):
+        self.updates = []
+
+    def update_message(self, blocks, ts, text=None, channel_id=None):
+        self.updates.append(text)
+        return {'ok': True}
+
+    def post_thread_messages(self, messages, thread_ts, channel_id=None):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch):
+    monkeypatch.setenv('APP_ID', APP_ID)
+    monkeypatch.delenv('ANSWERS_TTL_SECONDS', raising=False)
+    monkeypatch.delenv('TABLE_THREADS_dev', raising=False)
+
+
+def test_posts_answer(stub_clients):
+    client = StubClient(chat_sync=lambda **kwargs: {'systemMessage': 'The answer', 'sourceAttributions': []})
+    stub_clients(chat_sync_module, qbusiness=client)
+    manager = StubSlackManager()
+
+    chat_sync_module.chat_sync('The question', '1700000000.000100', 'C0123456789', manager=manager)
+
+    assert client.calls == [
+        ('chat_sync', {'applicationId': APP_ID, 'userMessage': 'The question', 'chatMode': 'RETRIEVAL_MODE'})
+    ]
+    assert manager.updates == ['The answer']
+
+
+def test_posts_errors_to_processing_message(stub_clients):
+    def chat_sync(**kwargs):
+        raise ThrottlingException()
+
+    stub_clients(chat_sync_module, qbusiness=StubClient(chat_sync=chat_sync))
+    manager = StubSlackManager()
+
+    chat_sync_module.chat_sync('The question', '1700000000.000100', 'C0123456789', manager=manager)
+
+    assert manager.updates == ['ThrottlingException']
+
+
+def test_raises_throttling_to_retry_later(stub_clients):
+    def chat_sync(**kwargs):
+        raise ThrottlingException()
+
+    stub_clients(chat_sync_module, qbusiness=StubClient(chat_sync=chat_sync))
+    manager = StubSlackManager()
+
+    with pytest.raises(ThrottlingException):
+        chat_sync_module.chat_sync(
+            'The question', '1700000000.000100', 'C0123456789', manager=manager, raise_on_throttling=True
+        )
+
+    assert manager.updates == []
@@ -0,0 +1,155 @@
+import json
+import socket
+import threading
+
+import pytest
+
+from slack_sdk.web.connection_pool import _STALE_CONNECTION_ERRORS, HTTPConnectionPool
+
+
+RESPONSE = b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 11\r\n\r\n{"ok":true}'
+
+
+class SlackStandIn:
+    # Answers every request on keep-alive connections, except those whose number is given in actions:
+    # 'close' closes the connection right after the response and 'drop' closes it without answering
+    def __init__(self, **actions):
+        self.actions = {int(number): action for number, action in actions.items()}
+        self.requests = []
+        self.connections = 0
+        self.closed = threading.Event()
+        self.__server = socket.create_server(('127.0.0.1', 0))
+        self.url = f'http://127.0.0.1:{self.__server.getsockname()[1]}/api/chat.postMessage'
+
+        threading.Thread(target=self.__serve, daemon=True).start()
+
+    def __serve(self):
+        while True:
+            try:
+                sock, _ = self.__server.accept()
+            except OSError:
+                return
+
+            self.connections += 1
+            threading.Thread(target=self.__handle, args=(sock, self.connections), daemon=True).start()
+
+    def __handle(self, sock, connection):
+        try:
+            with sock, sock.makefile('rb') as rfile:
+                while True:
+                    request_line = rfile.readline()
+                    if not request_line:
+                        return
+
+                    headers = {}
+                    for line in iter(rfile.readline, b'\r\n'):
+                        name, value = line.decode('latin-1').split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+                    rfile.read(int(headers.get('content-length', 0)))
+
+                    self.requests.append((connection, request_line.split()[0].decode('latin-1')))
+                    action = self.actions.get(len(self.requests))
+
+                    if action == 'drop':
+                        return
+
+                    sock.sendall(RESPONSE)
+
+                    if action == 'close':
+                        return
+        finally:
+            self.closed.set()
+
+    def close(self):
+        self.__server.close()
+
+
+@pytest.fixture
+def stand_in():
+    servers = []
+
+    def start(**actions):
+        servers.append(SlackStandIn(**actions))
+        return servers[-1]
+
+    yield start
+
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def pool():
+    pool = HTTPConnectionPool()
+    yield pool
+    pool.close()
+
+
+def post(pool, server, method='POST'):
+    response, data = pool.request(
+        method, server.url, body=b'{"channel":"C0123456789"}', headers={'Content-Type': 'application/json'}, timeout=5
+    )
+    return response.status, json.loads(data)
+
+
+def test_reuses_connections(stand_in, pool):
+    server = stand_in()
+
+    for _ in range(3):
+        assert post(pool, server) == (200, {'ok': True})
+
+    assert server.requests == [(1, 'POST')] * 3
+
+
+def test_evicts_idle_connections(stand_in, pool):
+    pool.idle_timeout = 0
+    server = stand_in()
+
+    post(pool, server)
+    post(pool, server)
+
+    assert server.requests == [(1, 'POST'), (2, 'POST')]
+
+
+def test_discards_idle_connections_closed_by_server(stand_in, pool):
+    server = stand_in(**{'1': 'close'})
+
+    post(pool, server)
+    assert server.closed.wait(5)
+
+    assert post(pool, server) == (200, {'ok': True})
+    assert server.requests == [(1, 'POST'), (2, 'POST')]
+
+
+def test_retries_request_that_could_not_be_sent(stand_in, pool, monkeypatch):
+    server = stand_in()
+    post(pool, server)
+
+    # The pooled connection fails before anything reaches the server
+    def request(*args, **kwargs):
+        raise BrokenPipeError()
+
+    (conn, _), = next(iter(pool._idle.values()))
+    monkeypatch.setattr(conn, 'request', request)
+
+    assert post(pool, server) == (200, {'ok': True})
+    assert server.requests == [(1, 'POST'), (2, 'POST')]
+
+
+def test_does_not_resend_request_after_it_was_sent(stand_in, pool):
+    # The server reads the second request, which it may have processed, and drops the connection
+    server = stand_in(**{'2': 'drop'})
+    post(pool, server)
+
+    with pytest.raises(_STALE_CONNECTION_ERRORS):
+        post(pool, server)
+
+    assert server.requests == [(1, 'POST'), (1, 'POST')]
+
+
+def test_resends_idempotent_request_after_it_was_sent(stand_in, pool):
+    server = stand_in(**{'2': 'drop'})
+    post(pool, server, method='GET')
+
+    assert post(pool, server, method='GET') == (200, {'ok': True})
+    assert server.requests == [(1, 'GET'), (1, 'GET'), (2, 'GET')]
@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+
+import pytest
+
+
+class ThrottlingException(Exception):
+    pass
+
+
+@pytest.fixture
+def function(load_function, monkeypatch):
+    module = load_function('func_chat_sync')
+
+    calls = []
+
+    def chat_sync(text, ts, channel_id, manager=None, raise_on_throttling=False, thread_ts=None, user_id=None):
+        calls.append({'text': text, 'raise_on_throttling': raise_on_throttling, 'thread_ts': thread_ts})
+
+        if text.startswith('throttled'):
+            raise ThrottlingException(text)
+
+    monkeypatch.setattr(module, 'chat_sync', chat_sync)
+    monkeypatch.setattr(module, 'SlackManager', lambda: None)
+
+    return module, calls
+
+
+def record(message_id, text, receive_count=1, **payload):
+    return {
+        'messageId': message_id,
+        'body': json.dumps({'text': text, 'ts': '1700000000.000100', 'channel_id': 'C0123456789', **payload}),
+        'attributes': {'ApproximateReceiveCount': str(receive_count)}
+    }
+
+
+def test_returns_failed_records(function):
+    module, calls = function
+
+    response = module.handler({'Records': [
+        record('m1', 'question 1'),
+        record('m2', 'throttled question'),
+        record('m3', 'question 3', thread_ts='1700000000.000050')
+    ]}, None)
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': 'm2'}]}
+    assert sorted(call['text'] for call in calls) == ['question 1', 'question 3', 'throttled question']
+
+
+def test_returns_no_failures_when_every_record_succeeds(function):
+    module, _ = function
+
+    response = module.handler({'Records': [record('m1', 'question 1'), record('m2', 'question 2')]}, None)
+
+    assert response == {'batchItemFailures': []}
+
+
+def test_replies_to_throttled_questions_on_last_attempt(function):
+    module, calls = function
+
+    module.handler({'Records': [record('m1', 'first attempt', 1), record('m2', 'last attempt', 5)]}, None)
+
+    assert {call['text']: call['raise_on_throttling'] for call in calls} == {
+        'first attempt': True,
+        'last attempt': False
+    }
+
+
+def test_answers_direct_invocations(function):
+    module, calls = function
+
+    module.handler({'text': 'question', 'ts': '1700000000.000100', 'channel_id': 'C0123456789'}, None)
+
+    assert calls == [{'text': 'question', 'raise_on_throttling': False, 'thread_ts': None}]
+
+
+def test_caps_questions_answered_at_same_time(load_function, monkeypatch):
+    monkeypatch.setenv('MAX_WORKERS', '2')
+    module = load_function('func_chat_sync')
+
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def chat_sync(*args, **kwargs):
+        with lock:
+            active.append(None)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+
+    monkeypatch.setattr(module, 'chat_sync', chat_sync)
+    monkeypatch.setattr(module, 'SlackManager', lambda: None)
+
+    response = module.handler({'Records': [record(f'm{i}', f'question {i}') for i in range(6)]}, None)
+
+    assert response == {'batchItemFailures': []}
+    assert len(peak) == 6
+    assert max(peak) == 2
@@ -0,0 +1,147 @@
+import hashlib
+import hmac
+import importlib
+import json
+import time
+
+from collections import OrderedDict
+from types import SimpleNamespace
+from urllib.parse import urlencode
+
+import pytest
+
+from tests.unit.conftest import StubClient
+
+
+slack_utils = importlib.import_module('app_layer.utils.slack_utils')
+idempotency_manager = importlib.import_module('app_layer.entity_managers.idempotency_manager')
+rate_limits_manager = importlib.import_module('app_layer.entity_managers.rate_limits_manager')
+
+SIGNING_SECRET = 'signing-secret'
+CONTEXT = SimpleNamespace(function_name='func_dispatcher')
+
+
+class StubSlackManager:
+    ephemeral_messages = []
+
+    def __init__(self, request=None):
+        self.channel_id = request.form['channel_id']
+        self.user_id = request.form['user_id']
+
+    def post_ephemeral(self, blocks, text=None, channel_id=None, user_id=None, thread_ts=None):
+        self.ephemeral_messages.append(text)
+
+
+def command_event(text, trigger_id='T1', signing_secret=SIGNING_SECRET):
+    body = urlencode({
+        'command': '/my-slash-command',
+        'text': text,
+        'user_id': 'U0123456789',
+        'user_name': 'alice',
+        'channel_id': 'C0123456789',
+        'trigger_id': trigger_id
+    })
+    timestamp = str(int(time.time()))
+    signature = 'v0=' + hmac.new(
+        signing_secret.encode('utf-8'), f'v0:{timestamp}:{body}'.encode('utf-8'), hashlib.sha256
+    ).hexdigest()
+
+    return {
+        'body': body,
+        'headers': {'X-Slack-Request-Timestamp': timestamp, 'X-Slack-Signature': signature}
+    }
+
+
+@pytest.fixture
+def function(load_function, stub_clients, monkeypatch):
+    module = load_function('func_dispatcher')
+
+    monkeypatch.setattr(slack_utils, 'get_secret_value', lambda secret_name: SIGNING_SECRET)
+
+    # Claims are kept in memory, and rate limits are only enforced locally
+    monkeypatch.setenv('TABLE_IDEMPOTENCY_dev', 'IdempotencyTable_dev')
+    monkeypatch.delenv('TABLE_RATE_LIMITS_dev', raising=False)
+    monkeypatch.setitem(vars(idempotency_manager), '__claimed_keys', OrderedDict())
+    monkeypatch.setitem(vars(rate_limits_manager), '__refill_times', {})
+    stub_clients(idempotency_manager, dynamodb=StubClient(put_item=lambda **kwargs: {}))
+
+    lambda_client = StubClient(invoke=lambda **kwargs: {'StatusCode': 202})
+    stub_clients(module, **{'lambda': lambda_client})
+
+    calls = []
+    monkeypatch.setattr(module, 'ask', lambda manager, text: calls.append(('ask', text)) or '1700000000.000100')
+    monkeypatch.setattr(module, 'chat_sync', lambda text, ts, channel_id, *args, **kwargs: calls.append(
+        ('chat_sync', text, ts, kwargs.get('thread_ts'))
+    ))
+    monkeypatch.setattr(module, 'display_help', lambda manager: calls.append(('display_help',)))
+    monkeypatch.setattr(module, 'SlackManager', StubSlackManager)
+    monkeypatch.setattr(StubSlackManager, 'ephemeral_messages', [])
+
+    return module, lambda_client, calls
+
+
+def test_hands_command_over_to_alias_of_its_environment(function):
+    module, lambda_client, calls = function
+    event = command_event('ask "How do I request access to staging?"')
+
+    module.handler(event, CONTEXT)
+
+    assert calls == []
+    assert [name for name, _ in lambda_client.calls] == ['invoke']
+    assert lambda_client.calls[0][1]['FunctionName'] == 'func_dispatcher:prod'
+    assert lambda_client.calls[0][1]['InvocationType'] == 'Event'
+    assert json.loads(lambda_client.calls[0][1]['Payload']) == event
+
+
+def test_asks_and_answers_in_same_invocation(function, monkeypatch):
+    module, lambda_client, calls = function
+    monkeypatch.setattr(slack_utils, 'is_user_allowed', lambda operation, username: True)
+
+    module.handler(command_event('ask "How do I request access to staging?" --dev'), CONTEXT)
+
+    assert lambda_client.calls == []
+    assert calls == [
+        ('ask', 'How do I request access to staging?'),
+        ('chat_sync', 'How do I request access to staging?', '1700000000.000100', None)
+    ]
+
+
+def test_posts_validation_errors_as_ephemeral_messages(function):
+    module, _, calls = function
+
+    # No user is allowed in the dev environment by default
+    module.handler(command_event('help --dev'), CONTEXT)
+
+    assert calls == []
+    assert StubSlackManager.ephemeral_messages == ["You don't have permission to access this resource."]
+
+
+def test_ignores_requests_with_invalid_signature(function):
+    module, lambda_client, calls = function
+
+    module.handler(command_event('help --dev', signing_secret='another-secret'), CONTEXT)
+
+    assert calls == []
+    assert lambda_client.calls == []
+    assert StubSlackManager.ephemeral_messages == []
+
+
+def test_runs_redelivered_command_once(function, monkeypatch):
+    module, _, calls = function
+    monkeypatch.setattr(slack_utils, 'is_user_allowed', lambda operation, username: True)
+
+    module.handler(command_event('help --dev', trigger_id='T1'), CONTEXT)
+    module.handler(command_event('help --dev', trigger_id='T1'), CONTEXT)
+
+    assert calls == [('display_help',)]
+
+
+def test_answers_follow_up_questions(function):
+    module, _, calls = function
+
+    module.handler({
+        'text': 'And for production?', 'ts': '1700000000.000200', 'channel_id': 'C0123456789',
+        'thread_ts': '1700000000.000100', 'user_id': 'U0123456789'
+    }, CONTEXT)
+
+    assert calls == [('chat_sync', 'And for production?', '1700000000.000200', '1700000000.000100')]
@@ -0,0 +1,98 @@
+import importlib
+import time
+
+from collections import OrderedDict
+
+import pytest
+
+from tests.unit.conftest import ConditionalCheckFailedException, StubClient
+
+
+idempotency_manager = importlib.import_module('app_layer.entity_managers.idempotency_manager')
+
+TABLE = 'IdempotencyTable_dev'
+
+
+class IdempotencyTable:
+    # Evaluates the conditional write of claim against items kept in memory
+    def __init__(self):
+        self.items = {}
+
+    def put_item(self, TableName, Item, ExpressionAttributeValues, **kwargs):
+        key = Item['idempotency_key']['S']
+        now = int(ExpressionAttributeValues[':now']['N'])
+
+        if key in self.items and self.items[key] >= now:
+            raise ConditionalCheckFailedException()
+
+        self.items[key] = int(Item['expires_at']['N'])
+
+    def delete_item(self, TableName, Key):
+        self.items.pop(Key['idempotency_key']['S'], None)
+
+
+@pytest.fixture
+def table(stub_clients, monkeypatch):
+    monkeypatch.setenv('TABLE_IDEMPOTENCY_dev', TABLE)
+    monkeypatch.setitem(vars(idempotency_manager), '__claimed_keys', OrderedDict())
+
+    items = IdempotencyTable()
+    client = StubClient(put_item=items.put_item, delete_item=items.delete_item)
+    stub_clients(idempotency_manager, dynamodb=client)
+
+    return items, client
+
+
+def forget_locally():
+    # As if the key had been claimed by another container
+    vars(idempotency_manager)['__claimed_keys'].clear()
+
+
+def test_claims_key_once(table):
+    _, client = table
+
+    assert idempotency_manager.claim('Ev0123456789')
+    assert idempotency_manager.is_claimed_locally('Ev0123456789')
+
+    # Retries reaching the same container are rejected without calling DynamoDB
+    assert not idempotency_manager.claim('Ev0123456789')
+    assert len(client.calls) == 1
+
+
+def test_rejects_key_claimed_by_another_container(table):
+    assert idempotency_manager.claim('Ev0123456789')
+    forget_locally()
+
+    assert not idempotency_manager.claim('Ev0123456789')
+    assert idempotency_manager.is_claimed_locally('Ev0123456789')
+
+
+def test_claims_expired_key_again(table):
+    items, _ = table
+
+    # Expired items may still be returned until DynamoDB deletes them
+    items.items['Ev0123456789'] = int(time.time()) - 60
+
+    assert idempotency_manager.claim('Ev0123456789')
+
+
+def test_released_key_can_be_claimed_again(table):
+    items, _ = table
+
+    assert idempotency_manager.claim('Ev0123456789')
+
+    idempotency_manager.release('Ev0123456789')
+
+    assert 'Ev0123456789' not in items.items
+    assert not idempotency_manager.is_claimed_locally('Ev0123456789')
+    assert idempotency_manager.claim('Ev0123456789')
+
+
+def test_forgets_least_recently_claimed_keys(table, monkeypatch):
+    monkeypatch.setitem(vars(idempotency_manager), '__LRU_MAX_SIZE', 2)
+
+    for key in ['Ev1', 'Ev2', 'Ev3']:
+        assert idempotency_manager.claim(key)
+
+    assert not idempotency_manager.is_claimed_locally('Ev1')
+    assert idempotency_manager.is_claimed_locally('Ev3')
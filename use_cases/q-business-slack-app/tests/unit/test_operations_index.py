@@ -0,0 +1,99 @@
+import importlib
+
+from collections import OrderedDict
+
+import pytest
+
+from tests.unit.conftest import StubClient
+
+
+operations_index = importlib.import_module('app_layer.utils.operations_index')
+
+compile_operation = vars(operations_index)['__compile_operation']
+
+
+class Body:
+    def __init__(self, text):
+        self.text = text
+
+    def read(self):
+        return self.text.encode('utf-8')
+
+
+def operation(**definition):
+    return compile_operation('ask', {'requiredOptions': [], 'acceptedOptions': ['--dev'], **definition})
+
+
+@pytest.fixture(autouse=True)
+def caches(monkeypatch):
+    monkeypatch.setitem(vars(operations_index), '__s3_allow_lists', {})
+    monkeypatch.setitem(vars(operations_index), '__dynamodb_allowed_users', OrderedDict())
+
+
+def test_compiles_every_operation_of_every_environment():
+    assert set(operations_index.OPERATIONS) == {'dev', 'prod'}
+    assert operations_index.get_operation('prod', 'ask').rate_limit['user'] == (5, 60)
+    assert operations_index.get_operation('prod', 'unknown') is None
+
+    with pytest.raises(TypeError):
+        operations_index.OPERATIONS['prod']['unknown'] = None
+
+
+def test_builds_error_messages_upfront():
+    compiled = compile_operation('ask', {'requiredOptions': ['--channel'], 'acceptedOptions': []})
+
+    assert compiled.required_options == (('--channel', 'Missing required option "--channel" for operation "ask".'),)
+
+
+def test_rejects_unsupported_allow_list_source():
+    with pytest.raises(ValueError):
+        operation(allowedUsersSource='https://example.com/users.txt')
+
+
+def test_allows_listed_users_or_everyone():
+    assert operations_index.is_user_allowed(operation(allowedUsers=['alice']), 'alice')
+    assert not operations_index.is_user_allowed(operation(allowedUsers=['alice']), 'bob')
+    assert operations_index.is_user_allowed(operation(allowedUsers=['*']), 'bob')
+
+
+def test_caches_s3_allow_list(stub_clients):
+    client = StubClient(get_object=lambda **kwargs: {'Body': Body('alice\n\nbob\n')})
+    stub_clients(operations_index, s3=client)
+    compiled = operation(allowedUsersSource='s3://allow-lists/ask.txt')
+
+    assert operations_index.is_user_allowed(compiled, 'alice')
+    assert operations_index.is_user_allowed(compiled, 'bob')
+    assert not operations_index.is_user_allowed(compiled, 'carol')
+
+    assert client.calls == [('get_object', {'Bucket': 'allow-lists', 'Key': 'ask.txt'})]
+
+
+def test_keeps_previous_s3_allow_list_when_it_cannot_be_loaded(stub_clients):
+    bodies = [Body('alice\n')]
+
+    def get_object(**kwargs):
+        if not bodies:
+            raise ConnectionError('Unable to reach S3')
+
+        return {'Body': bodies.pop()}
+
+    stub_clients(operations_index, s3=StubClient(get_object=get_object))
+
+    # Expired as soon as it is loaded
+    compiled = operation(allowedUsersSource='s3://allow-lists/ask.txt', allowedUsersTtlSeconds=0)
+
+    assert operations_index.is_user_allowed(compiled, 'alice')
+    assert operations_index.is_user_allowed(compiled, 'alice')
+
+
+def test_caches_dynamodb_lookups(stub_clients):
+    client = StubClient(get_item=lambda Key, **kwargs: {'Item': Key} if Key['username']['S'] == 'alice' else {})
+    stub_clients(operations_index, dynamodb=client)
+    compiled = operation(allowedUsersSource='dynamodb://AllowedUsers')
+
+    assert operations_index.is_user_allowed(compiled, 'alice')
+    assert not operations_index.is_user_allowed(compiled, 'bob')
+    assert operations_index.is_user_allowed(compiled, 'alice')
+    assert not operations_index.is_user_allowed(compiled, 'bob')
+
+    assert [kwargs['TableName'] for _, kwargs in client.calls] == ['AllowedUsers', 'AllowedUsers']
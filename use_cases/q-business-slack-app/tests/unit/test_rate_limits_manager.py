@@ -0,0 +1,113 @@
+import importlib
+
+import pytest
+
+from tests.unit.conftest import ConditionalCheckFailedException, StubClient
+
+
+rate_limits_manager = importlib.import_module('app_layer.entity_managers.rate_limits_manager')
+
+# Long enough for no token to be added while a test runs
+REFILL_SECONDS = 3600
+
+
+class BucketsTable:
+    # Evaluates the two conditional writes of consume against items kept in memory, by table and key
+    def __init__(self):
+        self.items = {}
+
+    def update_item(self, TableName, Key, ExpressionAttributeValues, ReturnValuesOnConditionCheckFailure, **kwargs):
+        values = {name: int(value['N']) for name, value in ExpressionAttributeValues.items()}
+        item = self.items.get((TableName, Key['bucket_key']['S']))
+
+        if ':now' in values:
+            allowed = item is None or item['refill_at'] <= values[':now']
+            updated = {'refill_at': values[':refill_at']}
+        else:
+            allowed = item is not None and item['refill_at'] <= values[':limit']
+            updated = {'refill_at': item['refill_at'] + values[':interval']} if item else None
+
+        if not allowed:
+            raise ConditionalCheckFailedException(
+                {'Item': {'refill_at': {'N': str(item['refill_at'])}}} if item else {}
+            )
+
+        self.items[(TableName, Key['bucket_key']['S'])] = updated
+
+        return {'Attributes': {'refill_at': {'N': str(updated['refill_at'])}}}
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch):
+    monkeypatch.setitem(vars(rate_limits_manager), '__refill_times', {})
+    monkeypatch.delenv('TABLE_RATE_LIMITS_prod', raising=False)
+    monkeypatch.delenv('TABLE_RATE_LIMITS_dev', raising=False)
+
+
+@pytest.fixture
+def table(stub_clients, monkeypatch):
+    monkeypatch.setenv('TABLE_RATE_LIMITS_prod', 'RateLimitsTable_prod')
+    monkeypatch.setenv('TABLE_RATE_LIMITS_dev', 'RateLimitsTable_dev')
+
+    buckets = BucketsTable()
+    client = StubClient(update_item=buckets.update_item)
+    stub_clients(rate_limits_manager, dynamodb=client)
+
+    return buckets, client
+
+
+def test_consumes_locally_without_table():
+    assert rate_limits_manager.consume('user#U1', 2, REFILL_SECONDS, 'prod') == 0
+    assert rate_limits_manager.consume('user#U1', 2, REFILL_SECONDS, 'prod') == 0
+
+    wait = rate_limits_manager.consume('user#U1', 2, REFILL_SECONDS, 'prod')
+    assert 0 < wait <= REFILL_SECONDS
+
+    # Other buckets have tokens of their own
+    assert rate_limits_manager.consume('user#U2', 2, REFILL_SECONDS, 'prod') == 0
+    assert rate_limits_manager.consume('user#U1', 2, REFILL_SECONDS, 'dev') == 0
+
+
+def test_consumes_until_bucket_is_empty(table):
+    _, client = table
+
+    assert [rate_limits_manager.consume('user#U1', 3, REFILL_SECONDS, 'prod') for _ in range(3)] == [0, 0, 0]
+
+    wait = rate_limits_manager.consume('user#U1', 3, REFILL_SECONDS, 'prod')
+    assert 0 < wait <= REFILL_SECONDS
+
+    # Once the container knows the bucket is empty, requests are rejected without calling DynamoDB
+    calls = len(client.calls)
+    assert rate_limits_manager.consume('user#U1', 3, REFILL_SECONDS, 'prod') > 0
+    assert len(client.calls) == calls
+
+
+def test_environments_have_buckets_of_their_own(table):
+    buckets, _ = table
+
+    assert rate_limits_manager.consume('user#U1', 1, REFILL_SECONDS, 'prod') == 0
+    assert rate_limits_manager.consume('user#U1', 1, REFILL_SECONDS, 'dev') == 0
+
+    assert set(buckets.items) == {('RateLimitsTable_prod', 'user#U1'), ('RateLimitsTable_dev', 'user#U1')}
+    assert rate_limits_manager.consume('user#U1', 1, REFILL_SECONDS, 'dev') > 0
+
+
+def test_recreates_expired_bucket(table):
+    buckets, _ = table
+
+    assert rate_limits_manager.consume('user#U1', 3, REFILL_SECONDS, 'prod') == 0
+
+    # The bucket expired and was deleted, but this container still knows it was used
+    buckets.items.clear()
+
+    assert rate_limits_manager.consume('user#U1', 3, REFILL_SECONDS, 'prod') == 0
+    assert ('RateLimitsTable_prod', 'user#U1') in buckets.items
+
+
+def test_allows_request_when_bucket_cannot_be_read(table, stub_clients):
+    def update_item(**kwargs):
+        raise ConditionalCheckFailedException()
+
+    stub_clients(rate_limits_manager, dynamodb=StubClient(update_item=update_item))
+
+    assert rate_limits_manager.consume('user#U1', 3, REFILL_SECONDS, 'prod') == 0
@@ -0,0 +1,60 @@
+import importlib
+
+import pytest
+
+from tests.unit.conftest import ClientError, StubClient
+
+
+slack_utils = importlib.import_module('app_layer.utils.slack_utils')
+rate_limits_manager = importlib.import_module('app_layer.entity_managers.rate_limits_manager')
+operations_index = importlib.import_module('app_layer.utils.operations_index')
+
+
+class ProvisionedThroughputExceededException(ClientError):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch):
+    monkeypatch.setitem(vars(rate_limits_manager), '__refill_times', {})
+    monkeypatch.delenv('TABLE_RATE_LIMITS_prod', raising=False)
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    records = []
+    monkeypatch.setattr(slack_utils, 'record_metric', lambda name, value, unit, **dimensions: records.append(
+        (name, value, dimensions)
+    ))
+
+    return records
+
+
+def test_rejects_requests_over_limit(metrics):
+    operation = operations_index.get_operation('prod', 'ask')
+
+    for _ in range(5):
+        slack_utils.check_rate_limits(operation, 'U0123456789', 'C0123456789', 'prod')
+
+    with pytest.raises(ValueError, match='You have sent too many "ask" requests'):
+        slack_utils.check_rate_limits(operation, 'U0123456789', 'C0123456789', 'prod')
+
+    assert metrics == [('RateLimitedRequests', 1, {'Scope': 'user'})]
+
+
+def test_lets_requests_through_when_limits_cannot_be_checked(stub_clients, monkeypatch, metrics):
+    monkeypatch.setenv('TABLE_RATE_LIMITS_prod', 'RateLimitsTable_prod')
+
+    def update_item(**kwargs):
+        raise ProvisionedThroughputExceededException()
+
+    client = StubClient(update_item=update_item)
+    stub_clients(rate_limits_manager, dynamodb=client)
+    stub_clients(slack_utils, dynamodb=client)
+
+    slack_utils.check_rate_limits(operations_index.get_operation('prod', 'ask'), 'U0123456789', 'C0123456789', 'prod')
+
+    assert [kwargs['Key']['bucket_key']['S'] for _, kwargs in client.calls] == [
+        'ask|user|U0123456789', 'ask|channel|C0123456789'
+    ]
+    assert metrics == [('RateLimiterErrors', 1, {'Scope': 'user'}), ('RateLimiterErrors', 1, {'Scope': 'channel'})]
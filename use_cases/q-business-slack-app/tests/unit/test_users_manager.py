@@ -0,0 +1,104 @@
+import importlib
+
+import pytest
+
+from tests.unit.conftest import StubClient
+
+
+users_manager = importlib.import_module('app_layer.entity_managers.users_manager')
+
+TABLE = 'UsersTable_dev'
+
+
+def user(username, user_id='U0123456789'):
+    return {'username': username, 'channel_id': 'D0123456789', 'user_id': user_id}
+
+
+def item(user):
+    return {key: {'S': value} for key, value in user.items()}
+
+
+def written_users(client):
+    return [
+        {key: value['S'] for key, value in request['PutRequest']['Item'].items()}
+        for name, kwargs in client.calls if name == 'batch_write_item'
+        for request in kwargs['RequestItems'][TABLE]
+    ]
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setitem(vars(users_manager), '__BATCH_BASE_DELAY_SECONDS', 0)
+
+
+def test_add_users_writes_chunks_of_25(stub_clients):
+    client = StubClient(batch_write_item=lambda **kwargs: {'UnprocessedItems': {}})
+    stub_clients(users_manager, dynamodb=client)
+    users = [user(f'user{i}') for i in range(60)]
+
+    assert users_manager.add_users(users, table_name=TABLE) == 60
+
+    assert sorted(len(kwargs['RequestItems'][TABLE]) for _, kwargs in client.calls) == [10, 25, 25]
+    assert sorted(written_users(client), key=lambda u: u['username']) == sorted(users, key=lambda u: u['username'])
+
+
+def test_add_users_keeps_last_duplicate(stub_clients):
+    client = StubClient(batch_write_item=lambda **kwargs: {'UnprocessedItems': {}})
+    stub_clients(users_manager, dynamodb=client)
+    users = [user('alice', 'U1'), user('bob', 'U2'), user('alice', 'U3')] + [user(f'user{i}') for i in range(30)]
+
+    assert users_manager.add_users(users, table_name=TABLE) == 32
+
+    written = written_users(client)
+    assert len(written) == 32
+    assert [u['user_id'] for u in written if u['username'] == 'alice'] == ['U3']
+
+
+def test_add_users_retries_unprocessed_items(stub_clients):
+    responses = iter([{'UnprocessedItems': {TABLE: [{'PutRequest': {'Item': item(user('bob'))}}]}},
+                      {'UnprocessedItems': {}}])
+    client = StubClient(batch_write_item=lambda **kwargs: next(responses))
+    stub_clients(users_manager, dynamodb=client)
+
+    users_manager.add_users([user('alice'), user('bob')], table_name=TABLE)
+
+    assert [len(kwargs['RequestItems'][TABLE]) for _, kwargs in client.calls] == [2, 1]
+
+
+def test_add_users_raises_when_items_stay_unprocessed(stub_clients):
+    client = StubClient(batch_write_item=lambda **kwargs: {'UnprocessedItems': kwargs['RequestItems']})
+    stub_clients(users_manager, dynamodb=client)
+
+    with pytest.raises(RuntimeError):
+        users_manager.add_users([user('alice')], table_name=TABLE)
+
+
+def test_get_users_deduplicates_and_skips_missing_users(stub_clients):
+    table = {u['username']: item(u) for u in [user(f'user{i}') for i in range(150)]}
+
+    def batch_get_item(RequestItems):
+        keys = [key['username']['S'] for key in RequestItems[TABLE]['Keys']]
+        assert len(keys) == len(set(keys)) <= 100
+        return {'Responses': {TABLE: [table[key] for key in keys if key in table]}, 'UnprocessedKeys': {}}
+
+    client = StubClient(batch_get_item=batch_get_item)
+    stub_clients(users_manager, dynamodb=client)
+    usernames = [f'user{i}' for i in range(150)] + ['user0', 'user1', 'unknown']
+
+    users = users_manager.get_users(usernames, table_name=TABLE)
+
+    assert sorted(u['username'] for u in users) == sorted(f'user{i}' for i in range(150))
+    assert len(client.calls) == 2
+
+
+def test_get_users_retries_unprocessed_keys(stub_clients):
+    responses = iter([
+        {'Responses': {TABLE: [item(user('alice'))]}, 'UnprocessedKeys': {TABLE: {'Keys': [{'username': {'S': 'bob'}}]}}},
+        {'Responses': {TABLE: [item(user('bob'))]}, 'UnprocessedKeys': {}}
+    ])
+    client = StubClient(batch_get_item=lambda **kwargs: next(responses))
+    stub_clients(users_manager, dynamodb=client)
+
+    users = users_manager.get_users(['alice', 'bob'], table_name=TABLE)
+
+    assert [u['username'] for u in users] == ['alice', 'bob']
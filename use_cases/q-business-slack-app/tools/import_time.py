@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+
+__ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+__ASSETS_PATH = os.path.join(__ROOT, 'q_business_slack_app_construct', 'assets', 'lambda_')
+__LAYER_PATH = os.path.join(__ASSETS_PATH, 'layer', 'python')
+
+# import time: self [us] | cumulative | imported package
+# Modules of the function itself, which include the time of everything else
+__ENTRY_POINT_MODULES = ['index', 'libs_finder']
+
+__IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$')
+
+
+def __get_functions():
+    return sorted(f for f in os.listdir(__ASSETS_PATH) if f.startswith('func_'))
+
+
+def __measure(function):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [__LAYER_PATH, env.get('PYTHONPATH')]))
+
+    # Load the layer the way Lambda does
+    env.setdefault('AWS_LAMBDA_FUNCTION_NAME', function)
+    env.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import index'],
+        cwd=os.path.join(__ASSETS_PATH, function),
+        env=env,
+        capture_output=True,
+        text=True
+    )
+
+    if result.returncode != 0:
+        raise RuntimeError(f'Unable to import {function}:\n{result.stderr}')
+
+    modules = {}
+
+    for line in result.stderr.splitlines():
+        match = __IMPORT_TIME_LINE.match(line)
+
+        if match is not None:
+            modules[match.group(3)] = int(match.group(2))
+
+    # The entry point includes the time of everything it imports, but not the modules loaded by the interpreter itself
+    return modules['index'], modules
+
+
+def __benchmark(function, repeat, top):
+    # The first run compiles the bytecode, which is cached from then on as it is in the deployed layer
+    __measure(function)
+
+    runs = [__measure(function) for _ in range(repeat)]
+    totals = [total_us for total_us, _ in runs]
+    modules = runs[totals.index(sorted(totals)[len(totals) // 2])][1]
+    modules = [(name, cumulative_us) for name, cumulative_us in modules.items() if name not in __ENTRY_POINT_MODULES]
+
+    return {
+        'medianMs': statistics.median(totals) / 1000,
+        'minMs': min(totals) / 1000,
+        'maxMs': max(totals) / 1000,
+        'slowestModules': {
+            name: cumulative_us / 1000
+            for name, cumulative_us in sorted(modules, key=lambda m: m[1], reverse=True)[:top]
+        }
+    }
+
+
+def __compare(results, baseline, threshold):
+    regressions = []
+
+    for function, result in results.items():
+        if function not in baseline:
+            continue
+
+        change = result['medianMs'] / baseline[function]['medianMs'] - 1
+        print(f'{function:<28}{baseline[function]["medianMs"]:>10.1f} ms ->{result["medianMs"]:>8.1f} ms'
+              f'{change:>+9.1%}')
+
+        if change > threshold:
+            regressions.append(function)
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the import time of each Lambda function entry point')
+    parser.add_argument('functions', nargs='*', help='Functions to measure. All of them by default')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of measurements per function')
+    parser.add_argument('--top', type=int, default=5, help='Number of slowest modules to report')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare the results with this JSON file written with --output')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Relative increase over the baseline that counts as a regression')
+
+    args = parser.parse_args()
+    results = {}
+
+    for function in args.functions or __get_functions():
+        results[function] = __benchmark(function, args.repeat, args.top)
+
+        print(f'{function:<28}{results[function]["medianMs"]:>10.1f} ms  '
+              f'(min {results[function]["minMs"]:.1f}, max {results[function]["maxMs"]:.1f})')
+
+        for name, cumulative_ms in results[function]['slowestModules'].items():
+            print(f'    {name:<40}{cumulative_ms:>8.1f} ms')
+
+    if args.output:
+        with open(args.output, 'w') as fd:
+            json.dump(results, fd, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fd:
+            regressions = __compare(results, json.load(fd), args.threshold)
+
+        if regressions:
+            print(f'Import time regressed for {", ".join(regressions)}', file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
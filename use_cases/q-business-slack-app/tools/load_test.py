@@ -0,0 +1,852 @@
+#!/usr/bin/env python3
+
+import argparse
+import decimal
+import hashlib
+import hmac
+import importlib.util
+import itertools
+import json
+import operator
+import os
+import random
+import re
+import sys
+import threading
+import time
+import traceback
+import uuid
+
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit
+
+
+__ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+__ASSETS_PATH = os.path.join(__ROOT, 'q_business_slack_app_construct', 'assets', 'lambda_')
+__LAYER_PATH = os.path.join(__ASSETS_PATH, 'layer', 'python')
+
+sys.path.insert(0, __LAYER_PATH)
+
+from app_layer.constants import *
+from app_layer.utils.slack_operations_definition import OP_ASK, OP_HELP, SLASH_COMMAND
+
+
+# Functions run in-process, along with the function that handles each kind of request sent by Slack
+__FUNCTIONS = ['handle_slash_command', 'ask', 'help', 'chat_sync', 'handle_slack_event']
+__ENTRY_POINTS = {
+    'ask': 'handle_slash_command',
+    'help': 'handle_slash_command',
+    'home': 'handle_slack_event',
+    'reply': 'handle_slack_event'
+}
+
+__ENV = Env.PROD.value
+__APP_ID = '00000000-0000-4000-8000-00000000a77e'
+__SLACK_TOKEN = 'xoxb-load-test'
+__SIGNING_SECRET = 'load-test-signing-secret'
+
+# Tables of the stand-in, with the name of their key attribute
+__TABLES = {
+    'USERS': KEY_USERNAME,
+    'IDEMPOTENCY': KEY_IDEMPOTENCY_KEY,
+    'RATE_LIMITS': KEY_BUCKET_KEY,
+    'THREADS': KEY_THREAD_KEY
+}
+
+__QUESTIONS = [
+    'How do I request access to the staging environment?',
+    'What is the process to expense a conference ticket?',
+    'Where can I find the runbook for the payments service?',
+    'Who approves changes to the production network configuration?',
+    'How many days of parental leave are we entitled to?'
+]
+
+
+class Histogram:
+    # Upper bounds of the buckets, in milliseconds
+    BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, float('inf')]
+
+    def __init__(self):
+        self.values = []
+        self.__lock = threading.Lock()
+
+    def add(self, value):
+        with self.__lock:
+            self.values.append(value)
+
+    def percentile(self, p):
+        values = sorted(self.values)
+        return values[min(len(values) - 1, int(len(values) * p))] if values else 0
+
+    def buckets(self):
+        counts = Counter()
+
+        for value in self.values:
+            counts[next(bound for bound in self.BUCKETS_MS if value <= bound)] += 1
+
+        return [(bound, counts[bound]) for bound in self.BUCKETS_MS]
+
+    def summary(self):
+        return {
+            'count': len(self.values),
+            'p50Ms': self.percentile(0.5),
+            'p90Ms': self.percentile(0.9),
+            'p99Ms': self.percentile(0.99),
+            'maxMs': max(self.values, default=0)
+        }
+
+
+class MetricsCollector:
+    # Replaces stdout while the functions run, to gather the metrics that they write in EMF, as in CloudWatch Logs.
+    # Functions that run at the same time in this process share the metrics of the layer, so any of them may write a
+    # value recorded by another one. Only the metrics of the stages are kept, without the name of the function, while
+    # the durations of the functions are measured by LocalLambda
+    IGNORED_METRICS = ['Duration', 'ColdStart', 'SecretsFetchTime']
+
+    def __init__(self):
+        self.histograms = defaultdict(Histogram)
+        self.counters = Counter()
+        self.logs = []
+        self.__buffers = threading.local()
+
+    def write(self, text):
+        # Lines may be written in several calls, but always by the same thread
+        buffer = getattr(self.__buffers, 'text', '') + text
+        *lines, self.__buffers.text = buffer.split('\n')
+
+        for line in lines:
+            self.__collect(line)
+
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def reset(self):
+        self.histograms.clear()
+        self.counters.clear()
+        self.logs.clear()
+
+    def __collect(self, line):
+        try:
+            document = json.loads(line)
+            metrics = document['_aws']['CloudWatchMetrics'][0]
+        except (ValueError, TypeError, KeyError):
+            self.logs.append(line)
+            return
+
+        dimensions = [f'{name}={document[name]}' for name in metrics['Dimensions'][0] if name not in ['FunctionName', 'Env']]
+
+        for metric in metrics['Metrics']:
+            if metric['Name'] in self.IGNORED_METRICS:
+                continue
+
+            stage = ' '.join([metric['Name']] + dimensions)
+            values = document[metric['Name']] if isinstance(document[metric['Name']], list) else [document[metric['Name']]]
+
+            if metric['Unit'] == 'Milliseconds':
+                for value in values:
+                    self.histograms[stage].add(value)
+            else:
+                self.counters[stage] += sum(values)
+
+
+class LambdaContext:
+    def __init__(self, function_name):
+        self.function_name = function_name
+        self.function_version = '1'
+        self.invoked_function_arn = f'arn:aws:lambda:us-east-1:000000000000:function:{function_name}:{Env.PROD.value}'
+        self.aws_request_id = str(uuid.uuid4())
+
+    def get_remaining_time_in_millis(self):
+        return 60000
+
+
+class LocalLambda:
+    # Runs the functions in-process when they are invoked through the stand-in of the Lambda API, and follows every
+    # request until none of the invocations that it caused is left running. Requests carry their id in their text,
+    # trigger id or event id, which is passed along from function to function
+    REQUEST_ID = re.compile(r'lt-(\d+)')
+
+    def __init__(self, handlers, collector, max_concurrency):
+        self.handlers = handlers
+        self.collector = collector
+        self.failures = Counter()
+        self.answered_threads = []
+        self.__executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self.__pending = Counter()
+        self.__requests = {}
+        self.__completed = 0
+        self.__condition = threading.Condition()
+
+    def start(self, request_id, kind):
+        with self.__condition:
+            self.__pending[request_id] += 1
+            self.__requests[request_id] = (kind, time.perf_counter())
+
+    def finish(self, request_id):
+        with self.__condition:
+            self.__pending[request_id] -= 1
+
+            if self.__pending[request_id] > 0:
+                return
+
+            del self.__pending[request_id]
+            kind, start = self.__requests.pop(request_id)
+            self.__completed += 1
+            self.__condition.notify_all()
+
+        self.collector.histograms[f'end-to-end {kind}'].add((time.perf_counter() - start) * 1000)
+
+    def wait(self, count, timeout):
+        with self.__condition:
+            self.__condition.wait_for(lambda: self.__completed >= count, timeout)
+            return self.__completed
+
+    def reset(self):
+        with self.__condition:
+            self.__completed = 0
+
+    def run(self, function, event):
+        start = time.perf_counter()
+
+        try:
+            return self.handlers[function](event, LambdaContext(function))
+        except Exception:
+            self.failures[function] += 1
+            print(traceback.format_exc(), file=sys.stderr)
+        finally:
+            self.collector.histograms[f'{function} Duration'].add((time.perf_counter() - start) * 1000)
+
+    def invoke(self, function, payload, asynchronous):
+        event = json.loads(payload or b'{}')
+
+        if not asynchronous:
+            return self.run(function, event)
+
+        match = self.REQUEST_ID.search(payload.decode('utf-8'))
+        request_id = int(match.group(1)) if match else None
+
+        if request_id is not None:
+            with self.__condition:
+                self.__pending[request_id] += 1
+
+        self.__executor.submit(self.__run_async, function, event, request_id, time.perf_counter())
+
+    def __run_async(self, function, event, request_id, queued_at):
+        self.collector.histograms[f'{function} InvokeQueueTime'].add((time.perf_counter() - queued_at) * 1000)
+
+        try:
+            self.run(function, event)
+
+            # Answers start threads where follow-up questions can be asked
+            if function == 'chat_sync' and 'thread_ts' not in event:
+                self.answered_threads.append((event['channel_id'], event['ts'], event['user_id']))
+        finally:
+            if request_id is not None:
+                self.finish(request_id)
+
+    def shutdown(self):
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+
+class StandIns:
+    # In-memory stand-ins of the Slack Web API and of the AWS APIs used by the functions, with a fixed latency per
+    # service. DynamoDB only supports the expressions used by the entity managers
+    VOCABULARY = ['access', 'request', 'the', 'team', 'approval', 'service', 'runbook', 'policy', 'with', 'and']
+
+    def __init__(self, local_lambda, secrets, slack_latency_ms, qbusiness_latency_ms, aws_latency_ms, answer_words):
+        self.local_lambda = local_lambda
+        self.calls = Counter()
+        self.error_answers = Counter()
+        self.__latencies = {'slack': slack_latency_ms, 'qbusiness': qbusiness_latency_ms, 'aws': aws_latency_ms}
+        self.__answer_words = answer_words
+        self.__tables = defaultdict(dict)
+        self.__key_names = {}
+        self.__timestamps = itertools.count(1)
+        self.__lock = threading.Lock()
+        self.__secrets = secrets
+
+    def add_table(self, table_name, key_name):
+        self.__key_names[table_name] = key_name
+
+    def handle(self, method, path, headers, body):
+        url = urlsplit(path)
+
+        if url.path.startswith('/api/'):
+            return self.__call('slack', url.path[len('/api/'):], self.__slack, url, headers, body)
+
+        target = headers.get('X-Amz-Target', '')
+
+        if target.startswith('DynamoDB_20120810.'):
+            return self.__call('aws', target, self.__dynamodb, target.split('.')[1], json.loads(body))
+
+        if target.startswith('secretsmanager.'):
+            return self.__call('aws', target, self.__secrets_manager, target.split('.')[1], json.loads(body))
+
+        if url.path.startswith('/2015-03-31/functions/'):
+            return self.__call('aws', 'lambda.Invoke', self.__lambda, url, headers, body)
+
+        if url.path.startswith('/applications/') and url.query == 'sync':
+            return self.__call('qbusiness', 'qbusiness.ChatSync', self.__qbusiness, json.loads(body))
+
+        return 404, {'message': f'{method} {path} is not supported by the stand-ins'}
+
+    def __call(self, service, name, func, *args):
+        self.calls[name] += 1
+        time.sleep(self.__latencies[service] / 1000)
+
+        return func(*args)
+
+    def __slack(self, url, headers, body):
+        api_method = url.path[len('/api/'):]
+
+        if headers.get('Content-Type', '').startswith('application/json'):
+            args = json.loads(body)
+        else:
+            args = dict(parse_qsl(url.query or body.decode('utf-8')))
+
+        if headers.get('Authorization') != f'Bearer {self.__secrets[SECRET_SLACK_TOKEN]}':
+            return 200, {'ok': False, 'error': 'invalid_auth'}
+
+        ts = f'{int(time.time())}.{next(self.__timestamps):06d}'
+
+        if api_method == 'chat.postMessage':
+            return 200, {'ok': True, 'channel': args['channel'], 'ts': ts, 'message': {'text': args.get('text')}}
+        elif api_method == 'chat.update':
+            self.__check_answer(args['blocks'])
+            return 200, {'ok': True, 'channel': args['channel'], 'ts': args['ts'], 'text': args.get('text')}
+        elif api_method == 'chat.postEphemeral':
+            return 200, {'ok': True, 'message_ts': ts}
+        elif api_method == 'users.profile.get':
+            return 200, {'ok': True, 'profile': {'email': f'{args["user"].lower()}@example.com'}}
+        elif api_method == 'views.publish':
+            return 200, {'ok': True, 'view': {'id': f'V{next(self.__timestamps)}'}}
+
+        return 200, {'ok': False, 'error': 'unknown_method'}
+
+    def __check_answer(self, blocks):
+        # Errors are reported to users by replacing the processing message with the error, after an :x: emoji
+        elements = blocks[0].get('elements', [{}])[0].get('elements', [])
+
+        if elements[:1] == [{'type': 'emoji', 'name': 'x'}]:
+            self.error_answers[elements[1]['text'].strip()] += 1
+
+    def __secrets_manager(self, operation, request):
+        if operation == 'GetSecretValue':
+            return 200, {'Name': request['SecretId'], 'SecretString': self.__secrets[request['SecretId']]}
+        elif operation == 'BatchGetSecretValue':
+            return 200, {
+                'SecretValues': [{'Name': name, 'SecretString': self.__secrets[name]} for name in request['SecretIdList']],
+                'Errors': []
+            }
+
+        return 400, {'__type': 'InvalidRequestException', 'message': f'{operation} is not supported'}
+
+    def __lambda(self, url, headers, body):
+        function_name = unquote(url.path.split('/')[3])
+        asynchronous = headers.get('X-Amz-Invocation-Type') == 'Event'
+
+        # Functions are invoked through their aliases, e.g. ask:prod
+        result = self.local_lambda.invoke(function_name.split(':')[0], body, asynchronous)
+
+        return (202, None) if asynchronous else (200, result)
+
+    def __qbusiness(self, request):
+        words = random.choices(self.VOCABULARY, k=self.__answer_words)
+        system_message = ' '.join(words)
+
+        # Some sources are cited twice, with different tracking parameters, so that they have to be merged
+        sources = [
+            {
+                'title': f'Document {i}',
+                'url': f'https://wiki.example.com/pages/{i % 4}?utm_source=load-test-{i}',
+                'snippet': ' '.join(words[i * 10:i * 10 + 20]),
+                'citationNumber': i + 1,
+                'textMessageSegments': [{'beginOffset': i * 10, 'endOffset': i * 10 + 20}]
+            }
+            for i in range(6)
+        ]
+
+        return 200, {
+            'conversationId': request.get('conversationId') or str(uuid.uuid4()),
+            'systemMessageId': str(uuid.uuid4()),
+            'userMessageId': str(uuid.uuid4()),
+            'systemMessage': system_message,
+            'sourceAttributions': sources
+        }
+
+    def __dynamodb(self, operation, request):
+        with self.__lock:
+            if operation == 'BatchGetItem':
+                return 200, {
+                    'Responses': {
+                        table_name: [item for item in map(self.__tables[table_name].get, map(self.__key, keys['Keys']))
+                                     if item is not None]
+                        for table_name, keys in request['RequestItems'].items()
+                    },
+                    'UnprocessedKeys': {}
+                }
+
+            table = self.__tables[request['TableName']]
+
+            if operation == 'Query':
+                return 200, self.__query(table, request)
+
+            if operation == 'PutItem':
+                key_name = self.__key_names[request['TableName']]
+                key = self.__key({key_name: request['Item'][key_name]})
+            else:
+                key = self.__key(request['Key'])
+
+            old_item = table.get(key)
+
+            if 'ConditionExpression' in request and not self.__evaluate(request, old_item or {}):
+                error = {
+                    '__type': 'com.amazonaws.dynamodb.v20120810#ConditionalCheckFailedException',
+                    'message': 'The conditional request failed'
+                }
+
+                if request.get('ReturnValuesOnConditionCheckFailure') == 'ALL_OLD' and old_item is not None:
+                    error['Item'] = old_item
+
+                return 400, error
+
+            if operation == 'GetItem':
+                return 200, {'Item': old_item} if old_item is not None else {}
+            elif operation == 'PutItem':
+                table[key] = request['Item']
+                return 200, {}
+            elif operation == 'DeleteItem':
+                table.pop(key, None)
+                return 200, {}
+            elif operation == 'UpdateItem':
+                item = dict(old_item or request['Key'])
+                updated = self.__update(request, item)
+                table[key] = item
+                return 200, {'Attributes': updated} if request.get('ReturnValues') == 'UPDATED_NEW' else {}
+
+        return 400, {'__type': 'com.amazonaws.dynamodb.v20120810#UnknownOperationException'}
+
+    @staticmethod
+    def __key(key):
+        return json.dumps(key, sort_keys=True)
+
+    @staticmethod
+    def __value(attribute_value):
+        if 'N' in attribute_value:
+            return decimal.Decimal(attribute_value['N'])
+
+        return next(iter(attribute_value.values()))
+
+    def __operand(self, token, request, item):
+        if token.startswith(':'):
+            return request['ExpressionAttributeValues'][token]
+
+        return item.get(request.get('ExpressionAttributeNames', {}).get(token, token))
+
+    def __compare(self, clause, request, item):
+        match = re.fullmatch(r'attribute_not_exists\((\S+)\)', clause)
+
+        if match:
+            return self.__operand(match.group(1), request, item) is None
+
+        left, comparison, right = clause.split()
+        left, right = self.__operand(left, request, item), self.__operand(right, request, item)
+
+        if left is None or right is None:
+            return False
+
+        comparisons = {'=': operator.eq, '<>': operator.ne, '<': operator.lt, '<=': operator.le, '>': operator.gt,
+                       '>=': operator.ge}
+
+        return comparisons[comparison](self.__value(left), self.__value(right))
+
+    def __evaluate(self, request, item):
+        return any(
+            all(self.__compare(clause.strip(), request, item) for clause in conjunction.split(' AND '))
+            for conjunction in request['ConditionExpression'].split(' OR ')
+        )
+
+    def __update(self, request, item):
+        # SET assignments of values or sums of values, all evaluated against the item before the update
+        updated = {}
+
+        for assignment in request['UpdateExpression'].removeprefix('SET ').split(','):
+            path, expression = [part.strip() for part in assignment.split('=')]
+            tokens = expression.split()
+            value = self.__operand(tokens[0], request, item)
+
+            for sign, token in zip(tokens[1::2], tokens[2::2]):
+                number = self.__value(value) + self.__value(self.__operand(token, request, item)) * (1 if sign == '+' else -1)
+                value = {'N': str(number)}
+
+            updated[request.get('ExpressionAttributeNames', {}).get(path, path)] = value
+
+        item.update(updated)
+
+        return updated
+
+    def __query(self, table, request):
+        # Equality on a single key, e.g. on the user id index
+        name, value = [part.strip() for part in request['KeyConditionExpression'].split('=')]
+        items = [item for item in table.values() if self.__compare(f'{name} = {value}', request, item)]
+        items = items[:request.get('Limit', len(items))]
+
+        if request.get('Select') == 'COUNT':
+            return {'Count': len(items), 'ScannedCount': len(items)}
+
+        return {'Items': items, 'Count': len(items), 'ScannedCount': len(items)}
+
+
+class StandInRequestHandler(BaseHTTPRequestHandler):
+    # Keep the connections alive, as Slack and AWS do, so that the pools of the clients are exercised
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and body are written separately, which would otherwise delay the body until the headers are acknowledged
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.__handle()
+
+    def do_POST(self):
+        self.__handle()
+
+    def log_message(self, format, *args):
+        pass
+
+    def __handle(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        status, response = self.server.stand_ins.handle(self.command, self.path, self.headers, body)
+        data = json.dumps(response).encode('utf-8') if response is not None else b''
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    # Bursts of new connections must not be refused while the functions ramp up
+    request_queue_size = 1024
+
+
+def __configure_environment(endpoint_url, args):
+    os.environ.update({
+        # Every AWS client created by the functions sends its requests to the stand-ins
+        'AWS_ENDPOINT_URL': endpoint_url,
+        'AWS_ACCESS_KEY_ID': 'load-test',
+        'AWS_SECRET_ACCESS_KEY': 'load-test',
+        'AWS_DEFAULT_REGION': 'us-east-1',
+        'AWS_MAX_POOL_CONNECTIONS': str(args.concurrency + args.lambda_concurrency),
+        'SLACK_API_URL': f'{endpoint_url}/api/',
+
+        # Load the layer the way Lambda does, as the prod alias
+        'AWS_LAMBDA_FUNCTION_NAME': 'load-test',
+        'AWS_LAMBDA_FUNCTION_VERSION': '1',
+        'APP_ID': __APP_ID,
+        'FUNC_ASK': 'ask',
+        'FUNC_HELP': 'help',
+        'FUNC_CHAT_SYNC': 'chat_sync',
+        'THREADS_TTL_SECONDS': '3600'
+    })
+
+    for table in __TABLES:
+        os.environ[f'TABLE_{table}_{__ENV}'] = f'load-test-{table.lower()}'
+
+
+def __load_handlers():
+    handlers = {}
+
+    # Each function imports the layer from its own folder, with its own libs_finder module
+    for function in __FUNCTIONS:
+        path = os.path.join(__ASSETS_PATH, f'func_{function}')
+        sys.path.insert(0, path)
+        sys.modules.pop('libs_finder', None)
+
+        try:
+            spec = importlib.util.spec_from_file_location(f'func_{function}', os.path.join(path, 'index.py'))
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        finally:
+            sys.path.remove(path)
+
+        handlers[function] = module.handler
+
+    return handlers
+
+
+def __sign(body, timestamp):
+    return 'v0=' + hmac.new(
+        __SIGNING_SECRET.encode('utf-8'), f'v0:{timestamp}:{body}'.encode('utf-8'), hashlib.sha256
+    ).hexdigest()
+
+
+def __signed_event(body):
+    timestamp = str(int(time.time()))
+
+    return {
+        'body': body,
+        'headers': {
+            'X-Slack-Request-Timestamp': timestamp,
+            'X-Slack-Signature': __sign(body, timestamp),
+        },
+        'isBase64Encoded': False
+    }
+
+
+def __slash_command_event(request_id, kind, user, channel):
+    text = f'{OP_ASK} "{random.choice(__QUESTIONS)} (lt-{request_id})"' if kind == 'ask' else OP_HELP
+
+    return __signed_event(urlencode({
+        'command': SLASH_COMMAND,
+        'text': text,
+        'user_id': user,
+        'user_name': user.lower(),
+        'channel_id': channel,
+        'trigger_id': f'lt-{request_id}.{uuid.uuid4().hex}',
+        'response_url': 'https://hooks.slack.com/commands/load-test'
+    }))
+
+
+def __slack_event(request_id, event):
+    return __signed_event(json.dumps({
+        'type': 'event_callback',
+        'event_id': f'Ev-lt-{request_id}',
+        'event': event
+    }))
+
+
+def __build_event(local_lambda, request_id, kind, user, channel):
+    if kind in ['ask', 'help']:
+        return kind, __slash_command_event(request_id, kind, user, channel)
+    elif kind == 'home':
+        return kind, __slack_event(request_id, {'type': 'app_home_opened', 'user': user, 'channel': channel, 'tab': 'home'})
+
+    # Follow-up questions are asked by the same user in the thread of an answer, once there is one
+    if not local_lambda.answered_threads:
+        return __build_event(local_lambda, request_id, 'ask', user, channel)
+
+    channel, thread_ts, user = random.choice(local_lambda.answered_threads)
+
+    return kind, __slack_event(request_id, {
+        'type': 'message',
+        'user': user,
+        'channel': channel,
+        'text': f'<@U0LOADTEST> {random.choice(__QUESTIONS)} (lt-{request_id})',
+        'ts': f'{time.time():.6f}',
+        'thread_ts': thread_ts
+    })
+
+
+def __send(local_lambda, request_id, kind, user, channel):
+    kind, event = __build_event(local_lambda, request_id, kind, user, channel)
+    local_lambda.start(request_id, kind)
+
+    try:
+        response = local_lambda.run(__ENTRY_POINTS[kind], event)
+
+        if response is None:
+            return 'failed'
+
+        # Commands that fail their validation are answered with the error message straight away
+        return 'rejected' if 'body' in response or response['statusCode'] != 200 else 'accepted'
+    finally:
+        local_lambda.finish(request_id)
+
+
+def __parse_mix(mix):
+    weights = {}
+
+    for entry in mix.split(','):
+        kind, weight = entry.split('=')
+
+        if kind not in __ENTRY_POINTS:
+            raise argparse.ArgumentTypeError(f'Unknown kind of request {kind!r}, expected one of {list(__ENTRY_POINTS)}')
+
+        weights[kind] = float(weight)
+
+    return weights
+
+
+def __drive(local_lambda, args, first_id, count):
+    kinds = random.choices(list(args.mix), weights=list(args.mix.values()), k=count)
+    start = time.perf_counter()
+
+    def send(i):
+        # Users and channels are spread so that the rate limits of the ask operation are only hit on purpose
+        user = f'U{random.randrange(args.users):08d}'
+        channel = f'C{random.randrange(args.channels):08d}'
+
+        return __send(local_lambda, first_id + i, kinds[i], user, channel)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        outcomes = Counter(executor.map(send, range(count)))
+
+    completed = local_lambda.wait(count, args.timeout)
+
+    return outcomes, completed, time.perf_counter() - start
+
+
+def __report(collector, stand_ins, local_lambda, outcomes, completed, elapsed, histograms):
+    print(f'{completed} requests completed in {elapsed:.2f} s: {completed / elapsed:.1f} requests/s '
+          f'({", ".join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items()))})')
+    print(f'{"stage":<56}{"count":>7}{"p50":>9}{"p90":>9}{"p99":>9}{"max":>9}  (ms)')
+
+    for stage, histogram in sorted(collector.histograms.items()):
+        summary = histogram.summary()
+        print(f'{stage:<56}{summary["count"]:>7}{summary["p50Ms"]:>9.1f}{summary["p90Ms"]:>9.1f}'
+              f'{summary["p99Ms"]:>9.1f}{summary["maxMs"]:>9.1f}')
+
+        if histograms:
+            scale = max(count for _, count in histogram.buckets()) or 1
+
+            for bound, count in histogram.buckets():
+                if count:
+                    print(f'    <= {bound:>6g} ms {"#" * max(1, count * 40 // scale):<40} {count}')
+
+    for name, count in sorted(collector.counters.items()):
+        if count:
+            print(f'{name:<56}{count:>7g}')
+
+    print(f'Stand-in calls: {", ".join(f"{name} {count}" for name, count in sorted(stand_ins.calls.items()))}')
+
+    for function, count in sorted(local_lambda.failures.items()):
+        print(f'{function} failed {count} times', file=sys.stderr)
+
+    for error, count in stand_ins.error_answers.most_common():
+        print(f'{count} answers replaced with the error: {error}', file=sys.stderr)
+
+
+def __results(collector, outcomes, completed, elapsed):
+    return {
+        'requests': sum(outcomes.values()),
+        'completed': completed,
+        'throughput': completed / elapsed,
+        'outcomes': dict(outcomes),
+        'stages': {
+            stage: {**histogram.summary(), 'buckets': {str(bound): count for bound, count in histogram.buckets()}}
+            for stage, histogram in sorted(collector.histograms.items())
+        },
+        'counters': dict(collector.counters)
+    }
+
+
+def __compare(results, baseline, threshold, min_change_ms):
+    regressions = []
+
+    for stage, summary in results['stages'].items():
+        if stage not in baseline['stages'] or not baseline['stages'][stage]['p90Ms']:
+            continue
+
+        change = summary['p90Ms'] / baseline['stages'][stage]['p90Ms'] - 1
+        print(f'{stage:<56}{baseline["stages"][stage]["p90Ms"]:>9.1f} ms ->{summary["p90Ms"]:>9.1f} ms{change:>+9.1%}')
+
+        # Tiny stages are too noisy to be compared by their relative change alone
+        if change > threshold and summary['p90Ms'] - baseline['stages'][stage]['p90Ms'] > min_change_ms:
+            regressions.append(stage)
+
+    change = results['throughput'] / baseline['throughput'] - 1
+    print(f'{"throughput":<56}{baseline["throughput"]:>9.1f} /s ->{results["throughput"]:>9.1f} /s{change:>+9.1%}')
+
+    if change < -threshold:
+        regressions.append('throughput')
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Load test the handlers of the Lambda functions in-process, against local stand-ins of Slack, '
+                    'Q Business, DynamoDB, Secrets Manager and Lambda'
+    )
+    parser.add_argument('--requests', type=int, default=500, help='Number of requests sent by Slack')
+    parser.add_argument('--concurrency', type=int, default=16, help='Number of requests sent at the same time')
+    parser.add_argument('--lambda-concurrency', type=int, default=64,
+                        help='Number of asynchronous invocations that can run at the same time')
+    parser.add_argument('--warmup', type=int, default=20, help='Number of requests sent before measuring')
+    parser.add_argument('--mix', type=__parse_mix, default='ask=7,help=1,home=1,reply=1',
+                        help='Relative weight of each kind of request')
+    parser.add_argument('--users', type=int, default=1000, help='Number of users sending the requests')
+    parser.add_argument('--channels', type=int, default=100, help='Number of channels where requests are sent')
+    parser.add_argument('--slack-latency', type=float, default=30, help='Latency of the Slack stand-in in ms')
+    parser.add_argument('--qbusiness-latency', type=float, default=800, help='Latency of the Q Business stand-in in ms')
+    parser.add_argument('--aws-latency', type=float, default=3, help='Latency of the other AWS stand-ins in ms')
+    parser.add_argument('--answer-words', type=int, default=300, help='Number of words of the answers')
+    parser.add_argument('--timeout', type=float, default=120, help='Seconds to wait for the requests to complete')
+    parser.add_argument('--seed', type=int, help='Seed of the random choices, to replay the same load')
+    parser.add_argument('--histograms', action='store_true', help='Print the latency histogram of every stage')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare the results with this JSON file written with --output')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative increase of p90 latency or decrease of throughput that counts as a regression')
+    parser.add_argument('--min-change', type=float, default=5,
+                        help='Increase of p90 latency in ms below which stages never count as a regression')
+
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    collector = MetricsCollector()
+    local_lambda = LocalLambda(None, collector, args.lambda_concurrency)
+    stand_ins = StandIns(
+        local_lambda,
+        {SECRET_SLACK_TOKEN: __SLACK_TOKEN, SECRET_SLACK_SIGNING_SECRET: __SIGNING_SECRET},
+        args.slack_latency, args.qbusiness_latency, args.aws_latency, args.answer_words
+    )
+
+    server = StandInServer(('127.0.0.1', 0), StandInRequestHandler)
+    server.stand_ins = stand_ins
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    __configure_environment(f'http://127.0.0.1:{server.server_port}', args)
+
+    for table, key_name in __TABLES.items():
+        stand_ins.add_table(os.environ[f'TABLE_{table}_{__ENV}'], key_name)
+
+    # The functions write their metrics and logs to stdout
+    sys.stdout = collector
+
+    try:
+        local_lambda.handlers = __load_handlers()
+
+        if args.warmup:
+            __drive(local_lambda, args, 0, args.warmup)
+
+        collector.reset()
+        stand_ins.calls.clear()
+        stand_ins.error_answers.clear()
+        local_lambda.reset()
+
+        outcomes, completed, elapsed = __drive(local_lambda, args, args.warmup, args.requests)
+    finally:
+        sys.stdout = sys.__stdout__
+        local_lambda.shutdown()
+        server.shutdown()
+
+    __report(collector, stand_ins, local_lambda, outcomes, completed, elapsed, args.histograms)
+
+    results = __results(collector, outcomes, completed, elapsed)
+
+    if args.output:
+        with open(args.output, 'w') as fd:
+            json.dump(results, fd, indent=2)
+
+    if completed < args.requests:
+        sys.exit(f'Only {completed} of {args.requests} requests completed within {args.timeout} seconds')
+
+    if args.baseline:
+        with open(args.baseline) as fd:
+            regressions = __compare(results, json.load(fd), args.threshold, args.min_change)
+
+        if regressions:
+            print(f'Latency regressed for {", ".join(regressions)}', file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import timeit
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+
+__ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+__LAYER_PATH = os.path.join(__ROOT, 'q_business_slack_app_construct', 'assets', 'lambda_', 'layer', 'python')
+
+sys.path.insert(0, __LAYER_PATH)
+
+from slack_sdk import WebClient
+from slack_sdk.models.blocks import (
+    ActionsBlock, ButtonElement, ContextBlock, DividerBlock, HeaderBlock, MarkdownTextObject, SectionBlock
+)
+from slack_sdk.web import HTTPConnectionPool, SlackResponse
+from slack_sdk.web.internal_utils import _build_req_args, _get_headers, convert_bool_to_0_or_1
+
+
+__TOKEN = 'xoxb-benchmark'
+
+# Number of pages returned by the stand-in for paginated methods
+__PAGES = 5
+
+# An answer with its sources, as posted by the functions
+__TEXT = ' '.join(['Requests for access to the staging environment are approved by the platform team.'] * 30)
+__BLOCKS = [
+    HeaderBlock(text='How do I request access to the staging environment?'),
+    SectionBlock(text=MarkdownTextObject(text=__TEXT[:3000])),
+    DividerBlock(),
+    *[
+        ContextBlock(elements=[MarkdownTextObject(text=f'<https://wiki.example.com/pages/{i}|Document {i}>')])
+        for i in range(5)
+    ],
+    ActionsBlock(elements=[ButtonElement(text='Helpful', action_id='helpful', value='1')])
+]
+__BLOCKS_DICT = [block.to_dict() for block in __BLOCKS]
+
+__PARAMS = {
+    'channel': 'C0123456789',
+    'limit': 200,
+    'exclude_archived': True,
+    'include_locale': False,
+    'types': 'public_channel,private_channel',
+    'cursor': None
+}
+
+
+class SlackStandInHandler(BaseHTTPRequestHandler):
+    # Keep-alive connections without delayed bodies, so that the client dominates the measurements
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        if self.path.endswith('/conversations.list'):
+            # Pages are numbered by their cursor, and the last one has none
+            page = int(dict(parse_qsl(body.decode('utf-8'))).get('cursor', 0))
+            response = {
+                'ok': True,
+                'channels': [{'id': f'C{page:04d}{i:06d}', 'name': f'channel-{i}'} for i in range(20)],
+                'response_metadata': {'next_cursor': str(page + 1) if page + 1 < self.server.pages else ''}
+            }
+        else:
+            response = {'ok': True, 'channel': 'C0123456789', 'ts': '1700000000.000100', 'message': {'text': 'ok'}}
+
+        data = json.dumps(response).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def __build_cases(base_url):
+    pooled_client = WebClient(token=__TOKEN, base_url=base_url, connection_pool=HTTPConnectionPool())
+    client = WebClient(token=__TOKEN, base_url=base_url)
+    api_url = f'{base_url}chat.postMessage'
+    response_body = json.dumps({'ok': True, 'channel': 'C0123456789', 'ts': '1700000000.000100', 'message': {}})
+    message = {'channel': 'C0123456789', 'blocks': __BLOCKS_DICT, 'text': __TEXT[:200]}
+
+    def build_req_args():
+        return _build_req_args(
+            token=__TOKEN, http_verb='POST', files=None, data=None, default_params={}, params=None,
+            json=dict(message), headers={}, auth=None, ssl=None, proxy=None
+        )
+
+    def request_args(**body):
+        args = {'headers': {'Authorization': f'Bearer {__TOKEN}'}, 'data': None, 'params': None, 'json': None}
+        args.update(body)
+        return args
+
+    def decode_response():
+        return SlackResponse(
+            client=pooled_client, http_verb='POST', api_url=api_url, req_args={}, data=json.loads(response_body),
+            headers={}, status_code=200
+        ).validate()
+
+    def paginate():
+        for _ in pooled_client.conversations_list(limit=20):
+            pass
+
+    # Each case is timed on its own, from the cheapest building blocks to the whole call
+    return {
+        'convert_bool_to_0_or_1': lambda: convert_bool_to_0_or_1(__PARAMS),
+        '_get_headers': lambda: _get_headers(
+            headers={}, token=__TOKEN, has_json=True, has_files=False, request_specific_headers=None
+        ),
+        '_build_urllib_request_headers': lambda: pooled_client._build_urllib_request_headers(
+            token=__TOKEN, has_json=True, has_files=False, additional_headers={}
+        ),
+        '_build_req_args': build_req_args,
+        'blocks.to_dict': lambda: [block.to_dict() for block in __BLOCKS],
+        'response.decode_validate': decode_response,
+        'http.json': lambda: pooled_client._perform_urllib_http_request(url=api_url, args=request_args(json=message)),
+        'http.form': lambda: pooled_client._perform_urllib_http_request(
+            url=api_url, args=request_args(params={'channel': 'C0123456789', 'text': __TEXT[:200]})
+        ),
+        'http.multipart': lambda: pooled_client._perform_urllib_http_request(
+            url=api_url, args=request_args(data={'channel': 'C0123456789', 'file': __TEXT.encode('utf-8')})
+        ),
+        'api_call.pooled': lambda: pooled_client.chat_postMessage(**message),
+        'api_call.urlopen': lambda: client.chat_postMessage(**message),
+        'pagination': paginate
+    }
+
+
+def __benchmark(func, repeat):
+    timer = timeit.Timer(func)
+
+    # Enough calls per measurement for it to take at least 0.2 seconds
+    number, _ = timer.autorange()
+    runs = [total / number * 1e6 for total in timer.repeat(repeat, number)]
+
+    return {
+        'medianUs': statistics.median(runs),
+        'minUs': min(runs),
+        'maxUs': max(runs),
+        'calls': number
+    }
+
+
+def __compare(results, baseline, threshold):
+    regressions = []
+
+    for case, result in results.items():
+        if case not in baseline:
+            continue
+
+        # The fastest measurement is the one least disturbed by the rest of the machine
+        change = result['minUs'] / baseline[case]['minUs'] - 1
+        print(f'{case:<32}{baseline[case]["minUs"]:>12.1f} us ->{result["minUs"]:>10.1f} us{change:>+9.1%}')
+
+        if change > threshold:
+            regressions.append(case)
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the request and response hot path of the Slack Web API client of the layer against a '
+                    'local stand-in of the Web API'
+    )
+    parser.add_argument('cases', nargs='*', help='Cases to run, or prefixes of their names. All of them by default')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of measurements per case')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare the results with this JSON file written with --output')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Relative increase over the baseline that counts as a regression')
+
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlackStandInHandler)
+    server.daemon_threads = True
+    server.pages = __PAGES
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results = {}
+
+    try:
+        for case, func in __build_cases(f'http://127.0.0.1:{server.server_port}/api/').items():
+            if args.cases and not any(case.startswith(prefix) for prefix in args.cases):
+                continue
+
+            results[case] = __benchmark(func, args.repeat)
+
+            print(f'{case:<32}{results[case]["medianUs"]:>12.1f} us  '
+                  f'(min {results[case]["minUs"]:.1f}, max {results[case]["maxUs"]:.1f}, {results[case]["calls"]} calls)')
+    finally:
+        server.shutdown()
+
+    if args.output:
+        with open(args.output, 'w') as fd:
+            json.dump(results, fd, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fd:
+            regressions = __compare(results, json.load(fd), args.threshold)
+
+        if regressions:
+            print(f'The Slack client regressed for {", ".join(regressions)}', file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
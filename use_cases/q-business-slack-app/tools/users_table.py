@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import sys
+
+from contextlib import nullcontext
+
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'q_business_slack_app_construct', 'assets', 'lambda_', 'layer', 'python'
+))
+
+from app_layer.entity_managers import users_manager
+
+
+def __get_table_name(args):
+    return args.table or f'{args.app_name}-UsersTable_{args.env}'
+
+
+def __import_users(args):
+    # Standard streams are left open for the rest of the process
+    with open(args.file) if args.file != '-' else nullcontext(sys.stdin) as fd:
+        users = [json.loads(line) for line in fd if line.strip()]
+
+    count = users_manager.add_users(users, table_name=__get_table_name(args), max_workers=args.workers)
+
+    print(f'Imported {count} users', file=sys.stderr)
+
+
+def __export_users(args):
+    users = users_manager.scan_users(table_name=__get_table_name(args), total_segments=args.workers)
+
+    with open(args.file, 'w') if args.file != '-' else nullcontext(sys.stdout) as fd:
+        for user in users:
+            fd.write(json.dumps(user) + '\n')
+
+    print(f'Exported {len(users)} users', file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import and export the users tables from and to JSON Lines files')
+    parser.add_argument('operation', choices=['import', 'export'])
+    parser.add_argument('file', help="JSON Lines file with one user per line, or '-' for stdin/stdout")
+    parser.add_argument('--app-name', default='q-business-slack-app', help='Value of the AppName stack parameter')
+    parser.add_argument('--env', choices=['dev', 'prod'], default='prod')
+    parser.add_argument('--table', help='Name of the table, which overrides --app-name and --env')
+    parser.add_argument('--workers', type=int, default=8, help='Number of parallel batches or scan segments')
+
+    args = parser.parse_args()
+
+    if args.operation == 'import':
+        __import_users(args)
+    else:
+        __export_users(args)
+
+
+if __name__ == '__main__':
+    main()